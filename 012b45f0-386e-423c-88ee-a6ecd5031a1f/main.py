@@ -1,6 +1,12 @@
 from surmount.base_class import Strategy, TargetAllocation, backtest
 from surmount.logging import log
 from datetime import datetime
+from functools import lru_cache
+
+@lru_cache(maxsize=2)
+def parse_date(value):
+   # the previous bar's date was parsed as "today" on the previous call
+   return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
 
 class TradingStrategy(Strategy):
 
@@ -18,6 +24,11 @@ class TradingStrategy(Strategy):
    def assets(self):
       return self.tickers
 
+   @property
+   def schedule(self):
+      # run() only allocates on the first bar on or after day 12 of the month
+      return {"month_day": 12, "hold": "none"}
+
    def run(self, data):
       if len(data['ohlcv']) < 2:
          self.counter += 1
@@ -31,8 +42,8 @@ class TradingStrategy(Strategy):
          else:
             return None
 
-      today = datetime.strptime(str(next(iter(data['ohlcv'][-1].values()))['date']), '%Y-%m-%d %H:%M:%S')
-      yesterday = datetime.strptime(str(next(iter(data['ohlcv'][-2].values()))['date']), '%Y-%m-%d %H:%M:%S')
+      today = parse_date(str(next(iter(data['ohlcv'][-1].values()))['date']))
+      yesterday = parse_date(str(next(iter(data['ohlcv'][-2].values()))['date']))
       
       if today.day == 12 or (today.day > 12 and yesterday.day < 12):
          if self.equal_weighting: 
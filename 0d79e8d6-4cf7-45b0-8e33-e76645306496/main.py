@@ -39,6 +39,18 @@ class TradingStrategy(Strategy):
         """The data interval required for the strategy."""
         return "1day"
 
+    @property
+    def schedule(self):
+        """Bars on which run() can change the allocation: only the rebalance
+        weekday; on every other bar it returns last_alloc again."""
+        return {"weekday": self.rebalance_day, "hold": "repeat"}
+
+    @property
+    def max_lookback(self):
+        """Bars run() looks at: the 512 MA-150 slopes ranked in
+        get_direction_category_slope start 150 bars in."""
+        return 150 + 512
+
     # ----------------------
     # Helper functions for ROAR Score Calculation
     # ----------------------
@@ -143,15 +155,18 @@ class TradingStrategy(Strategy):
         if len(ohlcv) < warmup_period:
             return TargetAllocation(self.last_alloc)
 
+        # only the last bar's date gates the run; parse the rest only when
+        # the series is actually needed, with the format given up front
+        today = pd.Timestamp(ohlcv[-1]["SPY"]["date"])
+        if today.weekday() != self.rebalance_day:
+            return TargetAllocation(self.last_alloc)
+
         spy_close = pd.Series(
             [d["SPY"]["close"] for d in ohlcv],
-            index=pd.to_datetime([d["SPY"]["date"] for d in ohlcv])
+            index=pd.to_datetime([d["SPY"]["date"] for d in ohlcv],
+                                 format="%Y-%m-%d %H:%M:%S")
         )
 
-        today = spy_close.index[-1]
-        if today.weekday() != self.rebalance_day:
-            return TargetAllocation(self.last_alloc)
-
         # --- ROAR Score Calculation ---
         ma_20 = spy_close.rolling(20).mean()
         ma_50 = spy_close.rolling(50).mean()
@@ -34,6 +34,12 @@ class TradingStrategy(Strategy):
         """The data interval required for the strategy."""
         return "1day"
 
+    @property
+    def schedule(self):
+        """Bars on which run() can change the allocation: only the rebalance
+        weekday; on every other bar it returns last_alloc again."""
+        return {"weekday": self.rebalance_day, "hold": "repeat"}
+
     # ----------------------
     # Helper functions for ROAR Score Calculation
     # These are adapted from the provided ROARScore script.
@@ -63,6 +63,11 @@ class TradingStrategy(Strategy):
     def data(self):
         return []
 
+    @property
+    def max_lookback(self):
+        # the 130-bar warm-up gate covers VWAP(100) and ohlcv[-126]
+        return 130
+
     def run(self, data):
 
         ohlcv = data["ohlcv"]
@@ -44,13 +44,15 @@ class TradingStrategy(Strategy):
             # Momentum Score: (3-month + 6-month return) / volatility
             three_month_return = (closes[-1] / closes[-63] - 1) if len(closes) >= 63 else 0  # Approx 3 months
             six_month_return = (closes[-1] / closes[-126] - 1) if len(closes) >= 126 else 0  # Approx 6 months
-            volatility = STDEV(ticker, ohlcv, 20)[-1] / closes[-1] if STDEV(ticker, ohlcv, 20) else 1  # 20-day std dev
+            stdev = STDEV(ticker, ohlcv, 20)
+            volatility = stdev[-1] / closes[-1] if stdev else 1  # 20-day std dev
             momentum_scores[ticker] = (three_month_return + six_month_return) / max(volatility, 0.01)  # Avoid division by zero
             volatilities[ticker] = volatility
 
             # Apply profit-taking rule
             one_month_return = (closes[-1] / closes[-21] - 1) if len(closes) >= 21 else 0  # Approx 1 month
-            rsi = RSI(ticker, ohlcv, 14)[-1] if RSI(ticker, ohlcv, 14) else 50
+            rsi = RSI(ticker, ohlcv, 14)
+            rsi = rsi[-1] if rsi else 50
             if one_month_return > 0.3 or rsi > 80:
                 log(f"Profit-taking triggered for {ticker}: Return={one_month_return:.2%}, RSI={rsi:.2f}")
                 momentum_scores[ticker] *= 0.85  # Reduce exposure by 15% (trim position)
@@ -58,8 +60,10 @@ class TradingStrategy(Strategy):
             # Apply stop-loss rule
             peak_price = max(closes[-63:])  # Last 3 months peak
             drop_from_peak = (peak_price - closes[-1]) / peak_price
-            sma_50 = SMA(ticker, ohlcv, 50)[-1] if SMA(ticker, ohlcv, 50) else closes[-1]
-            sma_200 = SMA(ticker, ohlcv, 200)[-1] if SMA(ticker, ohlcv, 200) else closes[-1]
+            sma_50 = SMA(ticker, ohlcv, 50)
+            sma_50 = sma_50[-1] if sma_50 else closes[-1]
+            sma_200 = SMA(ticker, ohlcv, 200)
+            sma_200 = sma_200[-1] if sma_200 else closes[-1]
             if drop_from_peak > 0.12 or sma_50 < sma_200:
                 log(f"Stop-loss triggered for {ticker}: Drop={drop_from_peak:.2%}, SMA50={sma_50:.2f}, SMA200={sma_200:.2f}")
                 momentum_scores[ticker] = 0  # Temporarily remove stock
@@ -4,6 +4,16 @@ from surmount.data import MedianCPI
 from surmount.logging import log
 import math
 
+try:
+    from _lib_profile import mark, profiled
+except ImportError:
+    # No profiler on the Surmount platform: the hooks are no-ops.
+    def mark(name):
+        pass
+
+    def profiled(name=None, ticker=None):
+        return lambda fn: fn
+
 class TradingStrategy(Strategy):
 
     def __init__(self):
@@ -52,6 +62,7 @@ class TradingStrategy(Strategy):
     # QUANT HELPERS
     # ============================================================
 
+    @profiled(ticker="ticker")
     def get_closes(self, ohlcv, ticker):
         closes = []
         for bar in ohlcv:
@@ -94,6 +105,7 @@ class TradingStrategy(Strategy):
             return None
         return ann_vol
 
+    @profiled(ticker="ticker")
     def is_above_sma(self, ticker, ohlcv, closes, length):
         try:
             sma = SMA(ticker, ohlcv, length=length)
@@ -107,6 +119,7 @@ class TradingStrategy(Strategy):
     # EXECUTION ENGINE
     # ============================================================
 
+    @profiled("run")
     def run(self, data):
         allocation = {t: 0.0 for t in self.investable_assets}
 
@@ -128,6 +141,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # XLU/TLT REGIME FILTER (The Core Engine)
             # ================================================
+            mark("XLU/TLT REGIME FILTER")
             # Align price arrays to handle any missing internal bars safely
             min_len = min(len(closes["XLU"]), len(closes["TLT"]))
             
@@ -155,6 +169,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # UNIVERSE SELECTION (Regime Dependent)
             # ================================================
+            mark("UNIVERSE SELECTION")
             if inflation_accelerating:
                 # Structural Inflation overrides everything
                 candidates = ["TIP", "SHY", "UUP", "GLD"]
@@ -171,6 +186,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # SYSTEMATIC TREND & MOMENTUM GATES
             # ================================================
+            mark("TREND & MOMENTUM GATES")
             scores = {t: self.composite_momentum(closes[t]) for t in candidates}
             ranked = sorted(scores.keys(), key=lambda t: scores[t], reverse=True)
 
@@ -180,6 +196,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # CORRELATED DRAWDOWN BRAKE
             # ================================================
+            mark("DRAWDOWN BRAKE")
             any_medium_positive = any(self.momentum(closes[t], 42) > 0 for t in candidates)
             if not any_medium_positive:
                 confirmed = [] # Trigger full defense
@@ -187,6 +204,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # RISK-PARITY WEIGHTING METRIC
             # ================================================
+            mark("RISK-PARITY WEIGHTING")
             def inv_vol_weights(assets):
                 vols = {}
                 for t in assets:
@@ -203,6 +221,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # ALLOCATION TIERS
             # ================================================
+            mark("ALLOCATION TIERS")
             if len(confirmed) >= 3:
                 hold = confirmed[:3]
                 weights = inv_vol_weights(hold)
@@ -223,6 +242,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # POST-PROCESSING & NORMALIZATION
             # ================================================
+            mark("NORMALIZATION")
             for t, w in weights.items():
                 if t in allocation:
                     allocation[t] = round(w, 4)
@@ -40,6 +40,18 @@ class TradingStrategy(Strategy):
         return vola
         #return series_log_return.rolling(window=252).std() * np.sqrt(252)       
 
+    def realized_volatility(self, log_returns, window):
+        """
+        Rolling realized_volatility_daily over the whole series at once. The
+        windowed sums of squared log returns are taken as differences of one
+        cumulative sum instead of calling back into Python for every window
+        """
+        log_returns = np.asarray(log_returns, dtype=float)
+        sum_sq = np.concatenate(([0.0], np.cumsum(log_returns**2)))
+        vola = np.full(len(log_returns), np.nan)
+        vola[window - 1:] = np.sqrt((sum_sq[window:] - sum_sq[:-window])/(window - 1))
+        return vola
+
 
     def run(self, data):
         self.count += 7
@@ -57,16 +69,15 @@ class TradingStrategy(Strategy):
 
             #log(f"{spy_data['log_returns'].iloc[-1]}")
             # GET BACKWARD LOOKING REALIZED VOLATILITY
-            spy_data['vol_current'] = spy_data.log_returns.rolling(window=INTERVAL_WINDOW).apply(self.realized_volatility_daily)
+            spy_data['vol_current'] = self.realized_volatility(spy_data.log_returns, INTERVAL_WINDOW)
             spy_data['vol_current'] = spy_data['vol_current'].rolling(3).mean().fillna(0)
             #log(f"{spy_data['vol_current'].iloc[-1]}")
 
             # GET FORWARD LOOKING REALIZED VOLATILITY 
-            spy_data['vol_future'] = spy_data.log_returns.shift(-n_future).fillna(0).rolling(window=INTERVAL_WINDOW).apply(self.realized_volatility_daily)
+            spy_data['vol_future'] = self.realized_volatility(spy_data.log_returns.shift(-n_future).fillna(0), INTERVAL_WINDOW)
             spy_data['vol_future'] = spy_data['vol_future'].rolling(15).mean().fillna(0)
                                             
             #log(f"{spy_data['vol_future'].iloc[-1]}")
-            volaT = np.percentile(spy_data['vol_current'], 40)
 
             #if self.count % 7 == 0:
             allocation_dict = {self.tickers[i]: self.weights[i] for i in range(len(self.tickers))}
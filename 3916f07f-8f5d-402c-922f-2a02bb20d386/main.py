@@ -136,7 +136,15 @@ class TradingStrategy(Strategy):
             #log(f"Inflation TILT: {cpi_value}")
             risk_off_assets = ["BIL", "UUP"]
         
-        safe_asset = max(risk_off_assets, key=lambda asset: self._calculate_momentum(asset, data["ohlcv"]))
+        # TLT is scored both as a safe asset and in the momentum universe;
+        # score each asset once per run
+        momentum = {}
+        def score(asset):
+            if asset not in momentum:
+                momentum[asset] = self._calculate_momentum(asset, data["ohlcv"])
+            return momentum[asset]
+
+        safe_asset = max(risk_off_assets, key=score)
         
         # If market benchmark close is below its quarterly VWAP, trigger risk-off state.
         if current_close < current_ema and self.counter == 0:
@@ -148,7 +156,7 @@ class TradingStrategy(Strategy):
         self.counter = 0 # Explicitly reset counter when in risk-on mode.
         
 
-        yield_assets_momentum = {asset: self._calculate_momentum(asset, data["ohlcv"]) for asset in self.momentum_assets}
+        yield_assets_momentum = {asset: score(asset) for asset in self.momentum_assets}
         top_yield_assets = sorted(yield_assets_momentum, key=yield_assets_momentum.get, reverse=True)[:3]
         
         if len(top_yield_assets) < 1 or yield_assets_momentum[top_yield_assets[-1]] == -999:
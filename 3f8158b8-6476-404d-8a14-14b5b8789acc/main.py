@@ -4,6 +4,7 @@ from surmount.technical_indicators import EMA
 from datetime import datetime
 import pandas as pd
 import numpy as np
+import heapq
 
 class TradingStrategy(Strategy):
     def __init__(self):
@@ -20,6 +21,10 @@ class TradingStrategy(Strategy):
         ]
         self.mrkt = "SPY"
         self.count = 5
+        # running np.percentile(vol_current, q) heaps, fed only new values
+        self.vol_percentiles = {q: None for q in (55, 80)}
+        self.vol_fed = 0
+        self.vol_start = None
 
     @property
     def interval(self):
@@ -38,6 +43,70 @@ class TradingStrategy(Strategy):
         vola =  np.sqrt(np.sum(series_log_return**2)/(n - 1))
         return vola
 
+    def realized_volatility(self, log_returns, window):
+        """
+        Rolling realized_volatility_daily over the whole series at once. The
+        windowed sums of squared log returns are taken as differences of one
+        cumulative sum instead of calling back into Python for every window
+        """
+        log_returns = np.asarray(log_returns, dtype=float)
+        sum_sq = np.concatenate(([0.0], np.cumsum(log_returns**2)))
+        vola = np.full(len(log_returns), np.nan)
+        vola[window - 1:] = np.sqrt((sum_sq[window:] - sum_sq[:-window])/(window - 1))
+        return vola
+
+    def push_percentile(self, heaps, x):
+        """
+        Insert x into a running np.percentile: the lowest floor((n - 1) * q) + 1
+        values sit in a max-heap, the rest in a min-heap
+        """
+        lower, upper = heaps["lower"], heaps["upper"]
+        if lower and x <= -lower[0]:
+            heapq.heappush(lower, -x)
+        else:
+            heapq.heappush(upper, x)
+        heaps["n"] += 1
+        target = int(np.floor((heaps["n"] - 1) * heaps["q"])) + 1
+        while len(lower) > target:
+            heapq.heappush(upper, -heapq.heappop(lower))
+        while len(lower) < target:
+            heapq.heappush(lower, -heapq.heappop(upper))
+
+    def read_percentile(self, heaps):
+        """
+        np.percentile's linear interpolation between the two heap tops
+        """
+        virtual = (heaps["n"] - 1) * heaps["q"]
+        gamma = virtual - np.floor(virtual)
+        a = -heaps["lower"][0]
+        b = heaps["upper"][0] if heaps["upper"] else a
+        if gamma >= 0.5:
+            return b - (b - a) * (1 - gamma)
+        return a + (b - a) * gamma
+
+    def vol_thresholds(self, vol_current, start):
+        """
+        np.percentile(vol_current, q) for q in self.vol_percentiles without
+        re-sorting the history: between bars vol_current only grows at the end
+        (its backfilled head is fixed once the first window is complete), so
+        only the values not seen yet are inserted
+        """
+        if start != self.vol_start or len(vol_current) < self.vol_fed:
+            self.vol_start = start
+            self.vol_fed = 0
+            self.vol_percentiles = {
+                q: {"q": q/100, "n": 0, "lower": [], "upper": []}
+                for q in self.vol_percentiles
+            }
+        new_values = vol_current[self.vol_fed:]
+        if np.isnan(new_values).any():
+            return {q: np.nan for q in self.vol_percentiles}
+        for x in new_values:
+            for heaps in self.vol_percentiles.values():
+                self.push_percentile(heaps, float(x))
+        self.vol_fed = len(vol_current)
+        return {q: self.read_percentile(h) for q, h in self.vol_percentiles.items()}
+
     def run(self, data):
         if len(data) > 0:
             today = datetime.strptime(str(next(iter(data['ohlcv'][-1].values()))['date']), '%Y-%m-%d %H:%M:%S')
@@ -60,13 +129,14 @@ class TradingStrategy(Strategy):
 
             if len(mrktData) > n_future:
                 # GET BACKWARD LOOKING REALIZED VOLATILITY
-                mrktData['vol_current'] = mrktData.log_returns.rolling(window=INTERVAL_WINDOW).apply(self.realized_volatility_daily)
+                mrktData['vol_current'] = self.realized_volatility(mrktData.log_returns, INTERVAL_WINDOW)
                 mrktData['vol_current'] = mrktData['vol_current'].bfill()
                 # GET FORWARD LOOKING REALIZED VOLATILITY 
-                mrktData['vol_future'] = mrktData.log_returns.shift(n_future).fillna(0).rolling(window=INTERVAL_WINDOW).apply(self.realized_volatility_daily)
+                mrktData['vol_future'] = self.realized_volatility(mrktData.log_returns.shift(n_future).fillna(0), INTERVAL_WINDOW)
                 mrktData['vol_future'] = mrktData['vol_future'].bfill()
-                volaT = np.percentile(mrktData['vol_current'], 55)
-                volaH = np.percentile(mrktData['vol_current'], 80)
+                thresholds = self.vol_thresholds(mrktData['vol_current'].values, str(next(iter(data['ohlcv'][0].values()))['date']))
+                volaT = thresholds[55]
+                volaH = thresholds[80]
                 mrktEMA = EMA(self.mrkt, data["ohlcv"], length=200)
                 mrktClose = mrktData.close.iloc[-1]
 
@@ -17,6 +17,11 @@ class TradingStrategy(Strategy):
    def assets(self):
       return self.tickers
 
+   @property
+   def schedule(self):
+      # run() only allocates on the first bar on or after day 14 of the month
+      return {"month_day": 14, "hold": "none"}
+
    def run(self, data):
       today = datetime.strptime(str(next(iter(data['ohlcv'][-1].values()))['date']), '%Y-%m-%d %H:%M:%S')
       yesterday = datetime.strptime(str(next(iter(data['ohlcv'][-2].values()))['date']), '%Y-%m-%d %H:%M:%S')
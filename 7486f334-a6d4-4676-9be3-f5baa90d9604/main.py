@@ -46,10 +46,11 @@ class TradingStrategy(Strategy):
         lpast_date = today - timedelta(days=82)
 
         # Find the index of the most recent trading day on or before past_date
+        # ("%Y-%m-%d %H:%M:%S" strings sort like the dates they spell, so
+        # the bars are compared without parsing them)
+        past_str = past_date.strftime("%Y-%m-%d %H:%M:%S")
         for i in range(len(ohlcv)-1, -1, -1):
-            date_str = ohlcv[i]["SPY"]["date"]
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")  # Updated format
-            if date_obj <= past_date:
+            if ohlcv[i]["SPY"]["date"] <= past_str:
                 past_index = i
                 break
         else:
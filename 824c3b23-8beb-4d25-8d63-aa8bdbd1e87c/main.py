@@ -1,5 +1,7 @@
 import pandas as pd
 import numpy as np
+from collections import deque
+from datetime import datetime
 from surmount.base_class import Strategy, TargetAllocation
 from surmount.logging import log
 
@@ -18,6 +20,9 @@ class TradingStrategy(Strategy):
 
         self.prev_top_asset = None
 
+        # Per-asset weekly/monthly TSI state, advanced only by new bars
+        self.tsi_state = {}
+
     @property
     def assets(self):
         return self._assets
@@ -30,21 +35,192 @@ class TradingStrategy(Strategy):
     # INDICATORS
     # -------------------------------------------------
 
-    def tsi(self, close, period=10):
-        diff = close.diff()
-        abs_diff = diff.abs()
+    # The TSI is ewm(span=10) of ewm(span=10) of the period-over-period
+    # change, divided by the same double smoothing of its absolute value,
+    # on resample("W-FRI").last() / resample("M").last() closes. Instead of
+    # resampling the whole history every day, the four EWMs are advanced
+    # once per completed period; the still-open period (which resample
+    # includes as its last row) is evaluated on a copy of the state.
+
+    def ewm_step(self, state, cur, period=10):
+
+        # pandas ewm(span=period, adjust=True).mean(), one value at a time;
+        # state is [weighted, old_wt, started]
+        factor = 1.0 - 1.0 / (1.0 + (period - 1) / 2.0)
+
+        if not state[2]:
+            state[0] = cur
+            state[2] = True
+        elif state[0] == state[0]:
+            state[1] *= factor
+            if cur == cur:
+                if state[0] != cur:
+                    state[0] = (
+                        state[1] * state[0] + cur
+                    ) / (state[1] + 1.0)
+                state[1] += 1.0
+        elif cur == cur:
+            state[0] = cur
+
+        return state[0]
+
+    def tsi_step(self, frame, close, commit):
+
+        ewms = (
+            frame["ewms"] if commit
+            else [list(s) for s in frame["ewms"]]
+        )
+
+        diff = close - frame["prev_close"]
+
+        ema2 = self.ewm_step(ewms[1], self.ewm_step(ewms[0], diff))
+        abs2 = self.ewm_step(ewms[3], self.ewm_step(ewms[2], abs(diff)))
+
+        if abs2 == 0:
+            value = np.nan if ema2 == 0 else ema2 * np.inf
+        else:
+            value = ema2 / abs2
+
+        if commit:
+            frame["prev_close"] = close
+            if value == value:
+                frame["values"].append(value)
+                frame["count"] += 1
+
+        return value
+
+    def tsi_roll(self, frame, key, close, step):
+
+        if frame["key"] is not None and key != frame["key"]:
+            self.tsi_step(frame, frame["close"], commit=True)
+            # periods without a bar are NaN rows in the resample
+            for _ in range((key - frame["key"]) // step - 1):
+                self.tsi_step(frame, np.nan, commit=True)
+
+        frame["key"] = key
+        frame["close"] = close
+
+    def tsi_tail(self, frame):
+
+        # (number of non-NaN TSI values, last ones) including the open period
+        value = self.tsi_step(frame, frame["close"], commit=False)
+
+        values = list(frame["values"])
+        count = frame["count"]
+
+        if value == value:
+            values.append(value)
+            count += 1
+
+        return count, values
+
+    def new_tsi_frame(self):
+
+        return {
+            "ewms": [[np.nan, 1.0, False] for _ in range(4)],
+            "prev_close": np.nan,
+            "values": deque(maxlen=9),
+            "count": 0,
+            "key": None,
+            "close": np.nan,
+        }
+
+    def sync_asset(self, asset, ohlcv):
+
+        state = self.tsi_state.get(asset)
+
+        if state is None or not (
+            0 < state["n"] <= len(ohlcv) and
+            ohlcv[state["n"] - 1][asset]["date"] == state["date"]
+        ):
+            state = {
+                "n": 0,
+                "date": None,
+                "weekly": self.new_tsi_frame(),
+                "monthly": self.new_tsi_frame(),
+                "highs": deque(maxlen=26),
+                "lows": deque(maxlen=26),
+                # the correlation step only uses the last 60 returns
+                "closes": deque(maxlen=61),
+            }
+
+        bars = [d[asset] for d in ohlcv[state["n"]:]]
+
+        for bar in bars:
+
+            day = datetime.strptime(str(bar["date"])[:10], "%Y-%m-%d")
+            week = day.toordinal() + (4 - day.weekday()) % 7
+            month = day.year * 12 + day.month
+
+            self.tsi_roll(state["weekly"], week, bar["close"], 7)
+            self.tsi_roll(state["monthly"], month, bar["close"], 1)
+
+            state["highs"].append(bar["high"])
+            state["lows"].append(bar["low"])
+            state["closes"].append(bar["close"])
+
+        if bars:
+            state["n"] = len(ohlcv)
+            state["date"] = bars[-1]["date"]
+
+        self.tsi_state[asset] = state
+
+        return state
+
+    def top_correlations(self, closes, top):
+
+        # corr(asset, top) for every asset, as
+        # pd.DataFrame({a: pd.Series(closes[a]).pct_change() ...})
+        # .dropna().tail(60).corr() would give it: same row alignment and
+        # pandas' own one-pass (Welford) pairwise formula, but only for the
+        # column that is used and without building the frame
+
+        names = list(closes)
+        if top not in closes:
+            return {}
 
-        ema1 = diff.ewm(span=period).mean()
-        ema2 = ema1.ewm(span=period).mean()
+        # RangeIndex alignment keeps the rows every series has
+        n = min(len(closes[a]) for a in names)
+        prices = np.array([list(closes[a])[:n] for a in names], dtype=float)
 
-        abs1 = abs_diff.ewm(span=period).mean()
-        abs2 = abs1.ewm(span=period).mean()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rets = prices[:, 1:] / prices[:, :-1] - 1
 
-        return ema2 / abs2
+        rets = rets[:, ~np.isnan(rets).any(axis=0)][:, -60:]
 
-    def ichimoku_base(self, high, low, period=26):
-        return (high.rolling(period).max() +
-                low.rolling(period).min()) / 2
+        t = names.index(top)
+        y = rets[t]
+        k = len(names)
+
+        mean_x = np.zeros(k)
+        ssq_x = np.zeros(k)
+        mean_y = ssq_y = 0.0
+        # pandas pairs column i with column j (i > j) as x, y; the
+        # accumulation is not symmetric in the last bit, so keep both
+        cov_xy = np.zeros(k)
+        cov_yx = np.zeros(k)
+
+        for nobs in range(1, rets.shape[1] + 1):
+            vx = rets[:, nobs - 1]
+            vy = y[nobs - 1]
+            dx = vx - mean_x
+            dy = vy - mean_y
+            mean_x = mean_x + 1. / nobs * dx
+            mean_y = mean_y + 1. / nobs * dy
+            ssq_x = ssq_x + (vx - mean_x) * dx
+            ssq_y = ssq_y + (vy - mean_y) * dy
+            cov_xy = cov_xy + (vx - mean_x) * dy
+            cov_yx = cov_yx + (vy - mean_y) * dx
+
+        divisor = np.sqrt(ssq_x * ssq_y)
+        cov = np.where(np.arange(k) > t, cov_xy, cov_yx)
+
+        corr = np.full(k, np.nan)
+        ok = divisor != 0
+        if rets.shape[1]:
+            corr[ok] = cov[ok] / divisor[ok]
+
+        return dict(zip(names, corr))
 
     # -------------------------------------------------
     # MAIN LOGIC
@@ -63,41 +239,32 @@ class TradingStrategy(Strategy):
         # -----------------------------
         for asset in self.risk_assets:
 
-            df = pd.DataFrame({
-                "close": [d[asset]["close"] for d in ohlcv],
-                "high":  [d[asset]["high"] for d in ohlcv],
-                "low":   [d[asset]["low"] for d in ohlcv],
-            }, index=pd.to_datetime([d[asset]["date"] for d in ohlcv]))
-
-            weekly = df.resample("W-FRI").last()
-            monthly = df.resample("M").last()
+            state = self.sync_asset(asset, ohlcv)
 
-            weekly_tsi = self.tsi(weekly["close"], 10).dropna()
-            monthly_tsi = self.tsi(monthly["close"], 10).dropna()
+            weekly_count, weekly_tsi = self.tsi_tail(state["weekly"])
+            monthly_count, monthly_tsi = self.tsi_tail(state["monthly"])
 
-            if len(weekly_tsi) < 10 or len(monthly_tsi) < 4:
+            # 10 weekly values also give the 6 rolling(5) means needed
+            if weekly_count < 10 or monthly_count < 4:
                 continue
 
-            weekly_smooth = weekly_tsi.rolling(5).mean().dropna()
-
-            if len(weekly_smooth) < 6:
-                continue
+            weekly_smooth_last = sum(weekly_tsi[-5:]) / 5
+            weekly_smooth_prev = sum(weekly_tsi[-9:-4]) / 5
 
             score = (
-                0.75 * weekly_smooth.iloc[-1] +
-                0.25 * monthly_tsi.iloc[-1]
+                0.75 * weekly_smooth_last +
+                0.25 * monthly_tsi[-1]
             )
 
-            roc = (weekly_smooth.iloc[-1] - weekly_smooth.iloc[-5])
+            roc = (weekly_smooth_last - weekly_smooth_prev)
 
             # Ichimoku base
-            base_line = self.ichimoku_base(df["high"], df["low"])
-            price = df["close"].iloc[-1]
-            base = base_line.iloc[-1]
-
-            if np.isnan(base):
+            if len(state["highs"]) < 26:
                 continue
 
+            base = (max(state["highs"]) + min(state["lows"])) / 2
+            price = state["closes"][-1]
+
             if price > base:
                 cloud_mult = 1.0
             elif price > base * 0.97:
@@ -109,7 +276,7 @@ class TradingStrategy(Strategy):
                 "score": score,
                 "roc": roc,
                 "cloud_mult": cloud_mult,
-                "prices": df["close"]
+                "prices": list(state["closes"])
             }
 
         if len(asset_data) < 2:
@@ -145,26 +312,21 @@ class TradingStrategy(Strategy):
         # STEP 4: Correlation penalty
         # -----------------------------
         try:
-            returns_df = pd.DataFrame({
-                asset: asset_data[asset]["prices"].pct_change()
+            corrs = self.top_correlations({
+                asset: asset_data[asset]["prices"]
                 for asset in asset_data
-            }).dropna().tail(60)
-
-            corr_matrix = returns_df.corr()
+            }, provisional_top)
         except:
-            corr_matrix = None
+            corrs = {}
 
         lambda_penalty = 0.4
 
         for asset in asset_data:
 
-            if asset == provisional_top or corr_matrix is None:
+            if asset == provisional_top:
                 corr = 0.0
             else:
-                try:
-                    corr = corr_matrix.loc[asset, provisional_top]
-                except:
-                    corr = 0.0
+                corr = corrs.get(asset, 0.0)
 
             corr = max(0.0, corr)  # only penalize positive correlation
 
@@ -4,6 +4,16 @@ from surmount.data import MedianCPI
 from surmount.logging import log
 import math
 
+try:
+    from _lib_profile import mark, profiled
+except ImportError:
+    # No profiler on the Surmount platform: the hooks are no-ops.
+    def mark(name):
+        pass
+
+    def profiled(name=None, ticker=None):
+        return lambda fn: fn
+
 
 class TradingStrategy(Strategy):
 
@@ -37,10 +47,17 @@ class TradingStrategy(Strategy):
     def data(self):
         return self.data_list
 
+    @property
+    def max_lookback(self):
+        # the min_bars gate counts each ticker's own bars, so leave room
+        # for bars on which a sparse ticker is missing
+        return 2 * self.min_bars
+
     # ============================================================
     # HELPERS
     # ============================================================
 
+    @profiled(ticker="ticker")
     def get_closes(self, ohlcv, ticker):
         closes = []
         for bar in ohlcv:
@@ -97,6 +114,7 @@ class TradingStrategy(Strategy):
             return None
         return ann_vol
 
+    @profiled(ticker="ticker")
     def is_above_sma(
         self, ticker, ohlcv, closes, length
     ):
@@ -118,6 +136,7 @@ class TradingStrategy(Strategy):
     # MAIN STRATEGY
     # ============================================================
 
+    @profiled("run")
     def run(self, data):
         allocation = {
             t: 0.0 for t in self.tickers
@@ -157,6 +176,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # CPI REGIME
             # ================================================
+            mark("CPI REGIME")
             median_cpi_data = data.get(
                 ("median_cpi",)
             )
@@ -176,6 +196,7 @@ class TradingStrategy(Strategy):
             # Inflation: exclude long duration (TLT)
             # Normal: full FI + gold universe
             # ================================================
+            mark("UNIVERSE SELECTION")
             if inflation_on:
                 candidates = [
                     "TIP", "SHY", "BIL",
@@ -192,6 +213,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # MOMENTUM RANKING
             # ================================================
+            mark("MOMENTUM RANKING")
             scores = {
                 t: self.composite_momentum(
                     closes[t]
@@ -229,6 +251,7 @@ class TradingStrategy(Strategy):
             # This is the circuit breaker for the
             # 2026-style correlated drawdown.
             # ================================================
+            mark("DRAWDOWN BRAKE")
             any_short_positive = any(
                 self.momentum(closes[t], 21) > 0
                 for t in candidates
@@ -239,6 +262,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # INVERSE-VOL WEIGHTING
             # ================================================
+            mark("INVERSE-VOL WEIGHTING")
             def inv_vol_weights(assets):
                 vols = {}
                 for t in assets:
@@ -267,6 +291,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # ALLOCATION TIERS
             # ================================================
+            mark("ALLOCATION TIERS")
             if len(confirmed) >= 3:
                 hold = confirmed[:3]
                 weights = inv_vol_weights(hold)
@@ -300,6 +325,7 @@ class TradingStrategy(Strategy):
             # ================================================
             # APPLY & NORMALIZE
             # ================================================
+            mark("APPLY & NORMALIZE")
             for t, w in weights.items():
                 if t in allocation:
                     allocation[t] = round(w, 4)
@@ -156,6 +156,11 @@ class TradingStrategy(Strategy):
     def data(self):
         return self._data_list
 
+    @property
+    def max_lookback(self):
+        # _compute_weights only reads the last n_needed bars
+        return max(LOOKBACK, SMA_LOOKBACK, DIP_LOOKBACK, TREND_LOOKBACK) + 5
+
     def _today(self, data):
         ohlcv = data.get("ohlcv") or []
         if not ohlcv:
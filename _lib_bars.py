@@ -0,0 +1,395 @@
+"""Intraday bars rolled up into daily, weekly and monthly bars.
+
+Hourly strategies that need a daily quantity rebuild it from the whole
+intraday history on every call: e8a442ee's ``_daily_atr_pct`` aggregated
+every hourly bar into a date -> OHLC dict to read a lagged 14-day ATR, and
+f04579df calls ``ATR(ticker, ohlcv, 14)`` on the hourly bars themselves and
+uses the result as if it were a daily range. ``MultiResolutionBars`` does
+the roll-up once: ``sync`` only looks at bars it has not seen, and each
+intraday bar updates the period bar it belongs to in O(1) per resolution.
+
+A period bar opens at its first intraday open, takes the highest high and
+lowest low, closes at the last close and sums the volume. It is stamped
+with the start of the period (``"2024-03-04 00:00:00"`` for the week of
+Monday March 4th) so its date does not change while it forms. A period is
+complete once a bar of a later period arrives; completed bars are kept as
+Surmount-style ``{ticker: {...}}`` dicts, so any batch indicator accepts
+them (``_lib_indicators.ATR("QQQ", bars.completed("day"), 14)``).
+
+Indicators over completed bars are served per resolution by an
+``IndicatorEngine`` that is fed one bar each time a period completes, so a
+daily ATR costs O(1) per session however many hourly calls read it. Other
+batch functions go through ``batch`` and are cached until the next period
+completes.
+
+    bars = MultiResolutionBars(["QQQ", "SPY"])
+    ...
+    bars.sync(data["ohlcv"])                    # O(new bars)
+    atr = bars.indicator("ATR", "QQQ", 14)      # daily, sessions before today
+    today = bars.current("day")                 # the session forming now
+
+``SessionIndex`` is the matching lookup for the bars themselves. Strategies
+find the current session by string matching over the whole history
+(f3e26c2f's ``date.startswith(current_date_str)`` over every bar, the
+``"09:30" in date`` probe of f04579df, ``"13:" in date`` in d335a535);
+the index records each bar's session number, every session's first-bar
+offset and each bar's minute of the day as the bars arrive:
+
+    sessions = SessionIndex(bucket=30)
+    sessions.sync(data["ohlcv"])                # O(new bars)
+    start, stop = sessions.span()               # today: ohlcv[start:stop]
+    k = sessions.find("09:30")                  # today's 09:30 bar, or None
+"""
+import datetime
+import functools
+
+import numpy as np
+
+import _lib_indicators
+from _lib_indicators import STREAMING, IndicatorEngine
+from _lib_panel import FIELDS, _bar_date
+
+
+# ---------------------------------------------------------------------- #
+# Period labels                                                          #
+# ---------------------------------------------------------------------- #
+
+def _day(date):
+    return date[:10] + " 00:00:00"
+
+
+@functools.lru_cache(maxsize=4096)
+def _week(date):
+    day = datetime.date.fromisoformat(date[:10])
+    monday = day - datetime.timedelta(days=day.weekday())
+    return monday.isoformat() + " 00:00:00"
+
+
+def _month(date):
+    return date[:7] + "-01 00:00:00"
+
+
+RESOLUTIONS = {"day": _day, "week": _week, "month": _month}
+
+
+class _Resolution:
+    """Completed and forming bars of one resolution."""
+
+    def __init__(self, label, tickers):
+        self.label = label
+        self.engine = IndicatorEngine(tickers)
+        self.completed = []
+        self.forming = None
+        self.period = None
+        self.batches = {}
+
+    def add(self, date, bar):
+        period = self.label(date)
+        if period != self.period:
+            if self.forming:
+                self.completed.append(self.forming)
+                self.engine.update(self.forming)
+            self.forming = {}
+            self.period = period
+        for ticker, rec in bar.items():
+            if not rec or rec.get("close") is None:
+                continue
+            cur = self.forming.get(ticker)
+            if cur is None:
+                cur = self.forming[ticker] = {f: rec.get(f) for f in FIELDS}
+                cur["volume"] = cur["volume"] or 0.0
+                cur["date"] = period
+            else:
+                cur["high"] = max(cur["high"], rec["high"])
+                cur["low"] = min(cur["low"], rec["low"])
+                cur["close"] = rec["close"]
+                cur["volume"] += rec.get("volume") or 0.0
+
+
+class MultiResolutionBars:
+    """Daily / weekly / monthly bars of an intraday ``data["ohlcv"]``."""
+
+    def __init__(self, tickers=None, resolutions=("day", "week", "month")):
+        self.tickers = None if tickers is None else set(tickers)
+        for name in resolutions:
+            if name not in RESOLUTIONS:
+                raise ValueError(
+                    f"resolution must be one of {tuple(RESOLUTIONS)}")
+        self.resolutions = tuple(resolutions)
+        self.reset()
+
+    def reset(self):
+        """Drop every bar."""
+        tickers = sorted(self.tickers) if self.tickers else ()
+        self._res = {name: _Resolution(RESOLUTIONS[name], tickers)
+                     for name in self.resolutions}
+        self._last = None
+        self._n = 0
+
+    def __len__(self):
+        """Intraday bars consumed."""
+        return self._n
+
+    # ------------------------------------------------------------------ #
+    # Updates                                                            #
+    # ------------------------------------------------------------------ #
+
+    def append(self, bar):
+        """Add one intraday ``{ticker: {...}}`` bar."""
+        date = _bar_date(bar)
+        if date is None:
+            return
+        if self.tickers is not None:
+            bar = {t: rec for t, rec in bar.items() if t in self.tickers}
+        for res in self._res.values():
+            res.add(str(date), bar)
+        self._last = date
+        self._n += 1
+
+    def sync(self, ohlcv):
+        """Consume the bars of ``ohlcv`` not seen yet and return how many
+        were added. The newest bar already consumed is found by scanning
+        backwards by date; if the history no longer holds it, everything is
+        rebuilt from ``ohlcv``."""
+        if not len(ohlcv):
+            return 0
+        start = 0
+        if self._last is not None:
+            k = len(ohlcv) - 1
+            while k >= 0 and _bar_date(ohlcv[k]) != self._last:
+                k -= 1
+            if k < 0:
+                self.reset()
+            else:
+                start = k + 1
+        for k in range(start, len(ohlcv)):
+            self.append(ohlcv[k])
+        return len(ohlcv) - start
+
+    # ------------------------------------------------------------------ #
+    # Queries                                                            #
+    # ------------------------------------------------------------------ #
+
+    def _get(self, resolution):
+        try:
+            return self._res[resolution]
+        except KeyError:
+            raise ValueError(f"resolution {resolution!r} is not kept") \
+                from None
+
+    def completed(self, resolution="day"):
+        """Completed period bars, oldest first (the list itself — do not
+        mutate it)."""
+        return self._get(resolution).completed
+
+    def current(self, resolution="day"):
+        """The period bar still forming (``{}`` before the first bar)."""
+        return self._get(resolution).forming or {}
+
+    def indicator(self, name, ticker, *params, resolution="day"):
+        """Latest value of a streaming indicator (``SMA``, ``EMA``, ``RSI``,
+        ``ATR``, ``VWAP``, ``STDEV``, ``BB``) over the completed bars; None
+        while there are too few of them."""
+        if name not in STREAMING:
+            raise ValueError(f"{name} has no streaming form; use batch()")
+        return self._get(resolution).engine.value(name, ticker, *params)
+
+    def batch(self, name, ticker, *params, resolution="day"):
+        """Batch ``_lib_indicators`` function ``name`` over the completed
+        bars, computed once per completed period."""
+        res = self._get(resolution)
+        key = (name, ticker, params)
+        hit = res.batches.get(key)
+        if hit is None or hit[0] != len(res.completed):
+            value = getattr(_lib_indicators, name)(ticker, res.completed,
+                                                   *params)
+            hit = res.batches[key] = (len(res.completed), value)
+        return hit[1]
+
+
+# ---------------------------------------------------------------------- #
+# Session index                                                          #
+# ---------------------------------------------------------------------- #
+
+def _minute(date):
+    """Minute of the day of a ``"%Y-%m-%d %H:%M:%S"`` date (0 without a
+    time part)."""
+    if len(date) < 16:
+        return 0
+    return int(date[11:13]) * 60 + int(date[14:16])
+
+
+def _as_minute(time):
+    """Minute of the day of ``"HH:MM"`` or of an int minute."""
+    if isinstance(time, str):
+        hours, minutes = time.split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    return int(time)
+
+
+class SessionIndex:
+    """Session number, session start offset and time-of-day of every bar of
+    an intraday history, with time-of-day grouped into ``bucket``-minute
+    buckets.
+
+    Offsets and session numbers are relative to the history last passed to
+    ``sync``: when that history is a bounded window (``max_lookback``),
+    bars that have dropped off its front leave the index too, so
+    ``ohlcv[start:stop]`` stays valid. A session cut by the front of the
+    window starts at offset 0; ``position`` still counts its dropped bars."""
+
+    def __init__(self, bucket=60):
+        self.bucket = int(bucket)
+        if self.bucket < 1:
+            raise ValueError("bucket must be at least one minute")
+        self.reset()
+
+    def reset(self):
+        # absolute lists; the first ``_base`` bars are no longer in the
+        # history and are compacted away once they outnumber the rest
+        self._days = []         # session date, "YYYY-MM-DD"
+        self._starts = []       # absolute offset of each session's first bar
+        self._session = []      # absolute session number per bar
+        self._minute = []       # per bar
+        self._base = 0
+        self._last = None
+
+    def __len__(self):
+        return len(self._session) - self._base
+
+    def _first(self):
+        """Absolute number of the first session still in the history."""
+        return self._session[self._base] if len(self) else len(self._days)
+
+    def _drop(self, n):
+        """Forget the ``n`` oldest bars."""
+        self._base += n
+        if self._base > len(self):
+            first = self._first()
+            base = self._base
+            self._days = self._days[first:]
+            self._starts = [s - base for s in self._starts[first:]]
+            self._session = [i - first for i in self._session[base:]]
+            self._minute = self._minute[base:]
+            self._base = 0
+
+    def append(self, bar):
+        """Index one ``{ticker: {...}}`` bar."""
+        date = str(_bar_date(bar))
+        if not self._days or date[:10] != self._days[-1]:
+            self._days.append(date[:10])
+            self._starts.append(len(self._session))
+        self._session.append(len(self._days) - 1)
+        self._minute.append(_minute(date))
+        self._last = date
+
+    def sync(self, ohlcv):
+        """Index the bars of ``ohlcv`` not seen yet and return how many were
+        added; bars that are no longer at the front of ``ohlcv`` are
+        dropped. Rebuilds when the history no longer holds the newest bar
+        indexed (scanning backwards by date, as ``OHLCVPanel.sync``)."""
+        if not len(ohlcv):
+            return 0
+        start = 0
+        if self._last is not None:
+            k = len(ohlcv) - 1
+            while k >= 0 and str(_bar_date(ohlcv[k])) != self._last:
+                k -= 1
+            if k < 0:
+                self.reset()
+            else:
+                start = k + 1
+                self._drop(max(len(self) - start, 0))
+        for k in range(start, len(ohlcv)):
+            self.append(ohlcv[k])
+        return len(ohlcv) - start
+
+    # ------------------------------------------------------------------ #
+    # Per-bar arrays                                                     #
+    # ------------------------------------------------------------------ #
+
+    @property
+    def days(self):
+        """Date (``"YYYY-MM-DD"``) of every session in the history."""
+        return self._days[self._first():]
+
+    @property
+    def starts(self):
+        """Offset of every session's first bar in the history."""
+        return [max(s - self._base, 0)
+                for s in self._starts[self._first():]]
+
+    @property
+    def session_ids(self):
+        """0-based session number of every bar."""
+        ids = np.asarray(self._session[self._base:], dtype=np.int64)
+        return ids - self._first()
+
+    @property
+    def minutes(self):
+        """Minute of the day of every bar."""
+        return np.asarray(self._minute[self._base:], dtype=np.int64)
+
+    @property
+    def buckets(self):
+        """Time-of-day bucket of every bar (``minute // bucket``)."""
+        return self.minutes // self.bucket
+
+    @property
+    def positions(self):
+        """0-based position of every bar inside its session."""
+        ids = np.asarray(self._session[self._base:], dtype=np.int64)
+        starts = np.asarray(self._starts, dtype=np.int64)
+        return np.arange(self._base, len(self._session)) - starts[ids]
+
+    # ------------------------------------------------------------------ #
+    # Lookups                                                            #
+    # ------------------------------------------------------------------ #
+
+    def _bar(self, k):
+        """Absolute index of history offset ``k``."""
+        n = len(self)
+        if not -n <= k < n:
+            raise IndexError("bar out of range")
+        return self._base + k % n
+
+    def _session_id(self, session):
+        first = self._first()
+        n = len(self._days) - first
+        if not -n <= session < n:
+            raise IndexError("session out of range")
+        return first + session % n
+
+    def span(self, session=-1):
+        """``(start, stop)`` bar offsets of a session (default: the last),
+        so that ``ohlcv[start:stop]`` are its bars."""
+        i = self._session_id(session)
+        stop = self._starts[i + 1] if i + 1 < len(self._starts) \
+            else len(self._session)
+        return max(self._starts[i] - self._base, 0), stop - self._base
+
+    def session_of(self, k=-1):
+        """Session number of bar ``k``."""
+        return self._session[self._bar(k)] - self._first()
+
+    def position(self, k=-1):
+        """0-based position of bar ``k`` inside its session."""
+        k = self._bar(k)
+        return k - self._starts[self._session[k]]
+
+    def find(self, time, session=-1):
+        """Offset of the first bar of a session at ``time`` (``"HH:MM"`` or a
+        minute of the day), or None."""
+        minute = _as_minute(time)
+        start, stop = self.span(session)
+        for k in range(start, stop):
+            if self._minute[self._base + k] == minute:
+                return k
+        return None
+
+    def in_bucket(self, time, k=-1):
+        """Whether bar ``k`` falls in the same time-of-day bucket as
+        ``time`` (``"HH:MM"`` or a minute of the day)."""
+        minute = _as_minute(time)
+        return self._minute[self._bar(k)] // self.bucket == \
+            minute // self.bucket
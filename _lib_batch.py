@@ -0,0 +1,234 @@
+"""Replay every strategy directory in parallel over one shared bar set.
+
+Most strategies trade overlapping tickers (SPY, QQQ, TLT, GLD, BIL ...), so
+loading fixtures per strategy repeats the same parsing dozens of times.
+``run_batch`` instead:
+
+1. loads every ``<uuid>/main.py`` / ``main.json`` once against the
+   stand-in SDK to read its ``assets`` (directories that fail to load are
+   reported, not fatal);
+2. loads the union of those tickers from the fixtures once and copies it into
+   a ``multiprocessing.shared_memory`` block laid out field x ticker x bar
+   (NaN where a ticker has no bar);
+3. fans the strategies out over a process pool; each worker attaches to the
+   block, rebuilds the ``data["ohlcv"]`` bar list for just that strategy's
+   tickers and runs ``_lib_replay.replay``;
+4. writes one row per strategy (status, error, summary statistics) to a
+   consolidated CSV/Parquet table.
+
+    python _lib_batch.py fixtures/bars --datasets fixtures/datasets \\
+        --warmup 250 --workers 8 --out nightly.csv
+"""
+import argparse
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import _lib_replay
+from _lib_replay import BAR_FIELDS, DATE_FORMAT
+
+
+RESULT_COLUMNS = ("strategy", "status", "error", "tickers", "bars",
+                  "total_return", "max_drawdown", "turnover", "rebalances",
+                  "seconds", "ms_per_bar")
+
+
+def strategy_dirs(root=_lib_replay.ROOT):
+    return sorted(d for d in os.listdir(root)
+                  if os.path.isfile(os.path.join(root, d, "main.py"))
+                  or os.path.isfile(os.path.join(root, d, "main.json")))
+
+
+# ---------------------------------------------------------------------- #
+# Shared bar block                                                       #
+# ---------------------------------------------------------------------- #
+
+class SharedBars:
+    """field x ticker x bar float64 block in shared memory."""
+
+    def __init__(self, shm, tickers, dates, owner):
+        self.shm = shm
+        self.tickers = list(tickers)
+        self.dates = list(dates)
+        self._row = {t: i for i, t in enumerate(self.tickers)}
+        self.array = np.ndarray(
+            (len(BAR_FIELDS), len(self.tickers), len(self.dates)),
+            dtype=np.float64, buffer=shm.buf)
+        self._owner = owner
+
+    @classmethod
+    def from_frame(cls, frame):
+        tickers = sorted(frame["ticker"].unique())
+        dates = sorted(frame["date"].unique())
+        shape = (len(BAR_FIELDS), len(tickers), len(dates))
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(int(np.prod(shape)) * 8, 1))
+        stamps = [pd.Timestamp(d).strftime(DATE_FORMAT) for d in dates]
+        block = cls(shm, tickers, stamps, owner=True)
+        t_idx = pd.Index(tickers).get_indexer(frame["ticker"])
+        d_idx = pd.Index(dates).get_indexer(frame["date"])
+        block.array[:] = np.nan
+        for f, name in enumerate(BAR_FIELDS):
+            block.array[f, t_idx, d_idx] = frame[name].to_numpy(dtype=float)
+        return block
+
+    @classmethod
+    def attach(cls, name, tickers, dates):
+        return cls(shared_memory.SharedMemory(name=name), tickers, dates,
+                   owner=False)
+
+    def spec(self):
+        return self.shm.name, self.tickers, self.dates
+
+    def bars(self, tickers):
+        """``data["ohlcv"]`` list restricted to ``tickers``; bars in which
+        none of them trade are dropped."""
+        rows = [(t, self._row[t]) for t in tickers if t in self._row]
+        if not rows:
+            return []
+        idx = [i for _, i in rows]
+        fields = [self.array[f][idx].tolist() for f in range(len(BAR_FIELDS))]
+        present = (~np.isnan(self.array[3][idx])).tolist()
+        out = []
+        for j, stamp in enumerate(self.dates):
+            bar = {}
+            for k, (ticker, _) in enumerate(rows):
+                if present[k][j]:
+                    rec = {name: fields[f][k][j]
+                           for f, name in enumerate(BAR_FIELDS)}
+                    rec["date"] = stamp
+                    bar[ticker] = rec
+            if bar:
+                out.append(bar)
+        return out
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+# ---------------------------------------------------------------------- #
+# Workers                                                                #
+# ---------------------------------------------------------------------- #
+
+_BLOCK = None
+
+
+def _init_worker(name, tickers, dates):
+    global _BLOCK
+    _BLOCK = SharedBars.attach(name, tickers, dates)
+
+
+def _run_one(name, datasets_path, warmup):
+    row = {"strategy": name, "status": "ok", "error": ""}
+    try:
+        strategy = _lib_replay.load_strategy(name)
+        tickers = list(dict.fromkeys(strategy.assets))
+        row["tickers"] = len(tickers)
+        missing = [t for t in tickers if t not in _BLOCK._row]
+        if missing:
+            raise KeyError(f"no fixtures for {', '.join(missing)}")
+        bars = _BLOCK.bars(tickers)
+        datasets = _lib_replay.load_datasets(datasets_path,
+                                             strategy.data or [])
+        result = _lib_replay.replay(strategy, bars, datasets, warmup=warmup)
+        row.update(result.summary())
+        row.pop("start", None)
+        row.pop("end", None)
+    except Exception as exc:
+        row["status"] = "error"
+        row["error"] = f"{type(exc).__name__}: {exc}"
+        row["traceback"] = traceback.format_exc(limit=-3)
+    return row
+
+
+# ---------------------------------------------------------------------- #
+# Driver                                                                 #
+# ---------------------------------------------------------------------- #
+
+def collect_tickers(names):
+    """Union of ``assets`` over the strategies that import cleanly, plus the
+    import failures keyed by directory."""
+    tickers, failures = set(), {}
+    for name in names:
+        try:
+            tickers.update(_lib_replay.load_strategy(name).assets)
+        except Exception as exc:
+            failures[name] = f"{type(exc).__name__}: {exc}"
+    return tickers, failures
+
+
+def run_batch(bars_path, datasets_path=None, names=None, start=None, end=None,
+              warmup=0, workers=None):
+    """Replay ``names`` (default: every strategy directory) and return the
+    consolidated results as a DataFrame."""
+    names = strategy_dirs() if names is None else list(names)
+    started = time.perf_counter()
+    tickers, failures = collect_tickers(names)
+    frame = _lib_replay.load_frame(bars_path, tickers=tickers, start=start,
+                                   end=end)
+    block = SharedBars.from_frame(frame)
+    del frame
+
+    rows = [{"strategy": n, "status": "error", "error": e}
+            for n, e in failures.items()]
+    todo = [n for n in names if n not in failures]
+    try:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=block.spec()) as pool:
+            futures = [pool.submit(_run_one, n, datasets_path, warmup)
+                       for n in todo]
+            for future in as_completed(futures):
+                rows.append(future.result())
+    finally:
+        block.close()
+
+    table = pd.DataFrame(rows)
+    for column in RESULT_COLUMNS:
+        if column not in table:
+            table[column] = np.nan
+    extra = [c for c in table.columns if c not in RESULT_COLUMNS]
+    table = table[list(RESULT_COLUMNS) + extra].sort_values("strategy")
+    table.attrs["seconds"] = time.perf_counter() - started
+    return table.reset_index(drop=True)
+
+
+def write_table(table, path):
+    if path.endswith(".parquet"):
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("bars", help="bar fixture file or directory")
+    parser.add_argument("--datasets", help="dataset fixture directory")
+    parser.add_argument("--strategies", nargs="*",
+                        help="directories to run (default: all)")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--warmup", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", default="batch_results.csv")
+    args = parser.parse_args(argv)
+
+    table = run_batch(args.bars, args.datasets, args.strategies, args.start,
+                      args.end, args.warmup, args.workers)
+    write_table(table, args.out)
+    ok = (table["status"] == "ok").sum()
+    print(f"{ok}/{len(table)} strategies replayed in "
+          f"{table.attrs['seconds']:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""run() latency and scaling benchmarks for every strategy directory.
+
+For each strategy, interval (daily / hourly) and history length ``L`` the
+suite builds a synthetic random-walk history for the strategy's assets,
+primes a fresh ``TradingStrategy`` with one ``run()`` on ``L - 1`` bars (so
+strategies that cache state are measured in steady state, the way a live
+deployment calls them), then times ``repeat`` further calls, appending one
+bar before each.
+
+The median per-call latency at each length is fitted to ``t ~ L ** k`` on a
+log-log scale. A backtest of ``N`` bars then costs ``~ N ** (k + 1)``: a
+strategy whose per-call cost does not grow with history (``k ~ 0``) is
+linear overall, while ``k`` above ``tolerance`` (default 0.25) is flagged as
+worse than linear-time cumulative. Lengths are abandoned once one call takes
+longer than ``max_call`` seconds.
+
+Every run appends its records, tagged with the current git commit, to
+``.benchmarks/results.jsonl``; ``--compare`` reports calls that got slower
+than ``regression`` times the most recent record from another commit.
+
+    python _lib_bench.py --strategies 7486f334 0d79e8d6 --compare
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import _lib_replay
+from _lib_batch import strategy_dirs
+
+
+LENGTHS = (250, 1000, 5000, 20000)
+INTERVALS = ("1day", "1hour")
+RESULTS = os.path.join(_lib_replay.ROOT, ".benchmarks", "results.jsonl")
+HOURS = (10, 11, 12, 13, 14, 15, 16)
+
+
+# ---------------------------------------------------------------------- #
+# Synthetic history                                                      #
+# ---------------------------------------------------------------------- #
+
+def _timestamps(n, interval, start="2000-01-03"):
+    day = np.datetime64(start, "D")
+    stamps = []
+    while len(stamps) < n:
+        if np.is_busday(day):
+            if interval == "1hour":
+                stamps.extend(f"{day} {h:02d}:00:00" for h in HOURS)
+            else:
+                stamps.append(f"{day} 00:00:00")
+        day += 1
+    return stamps[:n]
+
+
+def synthetic_bars(tickers, n, interval="1day", seed=0):
+    """``data["ohlcv"]`` list of ``n`` random-walk bars for ``tickers``."""
+    rng = np.random.default_rng(seed)
+    stamps = _timestamps(n, interval)
+    scale = 0.01 if interval == "1day" else 0.004
+    columns = {}
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0002, scale, n)))
+        open_ = close * np.exp(rng.normal(0, scale / 2, n))
+        spread = np.abs(rng.normal(0, scale, n))
+        high = np.maximum(open_, close) * (1 + spread)
+        low = np.minimum(open_, close) * (1 - spread)
+        volume = rng.integers(1e5, 1e7, n).astype(float)
+        columns[ticker] = [c.tolist() for c in (open_, high, low, close,
+                                                volume)]
+    bars = []
+    for k, stamp in enumerate(stamps):
+        bar = {}
+        for ticker, (o, h, l, c, v) in columns.items():
+            bar[ticker] = {"open": o[k], "high": h[k], "low": l[k],
+                           "close": c[k], "volume": v[k], "date": stamp}
+        bars.append(bar)
+    return bars
+
+
+# ---------------------------------------------------------------------- #
+# Timing                                                                 #
+# ---------------------------------------------------------------------- #
+
+def time_length(name, bars, datasets, length, repeat):
+    """Per-call seconds of ``repeat`` steady-state calls at ``length``."""
+    strategy = _lib_replay.load_strategy(name)
+    history = bars[:length - 1]
+    data = dict(datasets, ohlcv=history)
+    strategy.run(data)
+    samples = []
+    for k in range(repeat):
+        history.append(bars[length - 1 + k])
+        started = time.perf_counter()
+        strategy.run(data)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def growth_exponent(lengths, seconds):
+    """Least-squares slope of log(seconds) on log(length)."""
+    points = [(math.log(n), math.log(t)) for n, t in zip(lengths, seconds)
+              if t > 0]
+    if len(points) < 2:
+        return math.nan
+    x, y = np.array(points).T
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def bench_strategy(name, lengths=LENGTHS, intervals=INTERVALS, repeat=5,
+                   max_call=2.0, tolerance=0.25, datasets_path=None, seed=0):
+    """Benchmark one strategy; returns one record per interval."""
+    records = []
+    try:
+        probe = _lib_replay.load_strategy(name)
+        tickers = list(dict.fromkeys(probe.assets))
+        datasets = _lib_replay.load_datasets(datasets_path, probe.data or [])
+    except Exception as exc:
+        return [{"strategy": name, "status": "error",
+                 "error": f"{type(exc).__name__}: {exc}"}]
+
+    for interval in intervals:
+        record = {"strategy": name, "interval": interval, "status": "ok",
+                  "error": "", "lengths": [], "median": [], "min": []}
+        bars = synthetic_bars(tickers, max(lengths) + repeat, interval, seed)
+        for length in sorted(lengths):
+            try:
+                samples = time_length(name, bars, datasets, length, repeat)
+            except Exception as exc:
+                record["status"] = "error"
+                record["error"] = f"{type(exc).__name__}: {exc} " \
+                                  f"(at {length} bars)"
+                break
+            record["lengths"].append(length)
+            record["median"].append(float(np.median(samples)))
+            record["min"].append(min(samples))
+            if record["median"][-1] > max_call:
+                record["status"] = "truncated"
+                break
+        exponent = growth_exponent(record["lengths"], record["median"])
+        record["exponent"] = exponent
+        record["superlinear"] = bool(exponent > tolerance)
+        records.append(record)
+    return records
+
+
+# ---------------------------------------------------------------------- #
+# Storage / regressions                                                  #
+# ---------------------------------------------------------------------- #
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_lib_replay.ROOT,
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save(records, path=RESULTS, commit=None):
+    commit = commit or current_commit()
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(dict(record, commit=commit, run_at=stamp))
+                    + "\n")
+
+
+def load(path=RESULTS):
+    if not os.path.isfile(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def regressions(records, history, threshold=1.5):
+    """(strategy, interval, length, before, after, commit) for every length
+    whose median got slower than ``threshold`` times the latest record of
+    the same strategy/interval from another commit."""
+    commit = records[0].get("commit") if records else None
+    previous = {}
+    for old in history:
+        if old.get("commit") != commit and old.get("lengths"):
+            previous[(old["strategy"], old.get("interval"))] = old
+    found = []
+    for record in records:
+        old = previous.get((record["strategy"], record.get("interval")))
+        if not old:
+            continue
+        before = dict(zip(old["lengths"], old["median"]))
+        for length, after in zip(record.get("lengths", []),
+                                 record.get("median", [])):
+            if length in before and after > threshold * before[length]:
+                found.append((record["strategy"], record["interval"], length,
+                              before[length], after, old["commit"]))
+    return found
+
+
+# ---------------------------------------------------------------------- #
+# CLI                                                                    #
+# ---------------------------------------------------------------------- #
+
+def _bench(args):
+    name, kwargs = args
+    return bench_strategy(name, **kwargs)
+
+
+def run_suite(names=None, workers=1, **kwargs):
+    names = strategy_dirs() if names is None else list(names)
+    jobs = [(name, kwargs) for name in names]
+    if workers == 1:
+        results = map(_bench, jobs)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_bench, jobs)
+    records = [r for batch in results for r in batch]
+    if workers != 1:
+        pool.shutdown()
+    return records
+
+
+def report(records):
+    def key(r):
+        k = r.get("exponent", math.nan)
+        return -k if k == k else math.inf
+
+    for r in sorted(records, key=key):
+        if r["status"] == "error" and not r.get("lengths"):
+            print(f"{r['strategy'][:8]} {r.get('interval', ''):>6} "
+                  f"ERROR {r['error']}")
+            continue
+        ms = " ".join(f"{n}:{1000 * t:.2f}ms"
+                      for n, t in zip(r["lengths"], r["median"]))
+        flag = " SUPERLINEAR" if r["superlinear"] else ""
+        print(f"{r['strategy'][:8]} {r['interval']:>6} k={r['exponent']:5.2f}"
+              f" [{r['status']}] {ms}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--strategies", nargs="*",
+                        help="directories to run (default: all)")
+    parser.add_argument("--lengths", nargs="*", type=int,
+                        default=list(LENGTHS))
+    parser.add_argument("--intervals", nargs="*", default=list(INTERVALS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-call", type=float, default=2.0)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--datasets", help="dataset fixture directory")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--results", default=RESULTS)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", action="store_true",
+                        help="report regressions against earlier commits")
+    parser.add_argument("--regression", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    records = run_suite(args.strategies, args.workers, lengths=args.lengths,
+                        intervals=args.intervals, repeat=args.repeat,
+                        max_call=args.max_call, tolerance=args.tolerance,
+                        datasets_path=args.datasets)
+    commit = current_commit()
+    for record in records:
+        record["commit"] = commit
+    report(records)
+    if args.compare:
+        for name, interval, length, before, after, old in regressions(
+                records, load(args.results), args.regression):
+            print(f"REGRESSION {name[:8]} {interval} @{length}: "
+                  f"{1000 * before:.2f}ms ({old}) -> {1000 * after:.2f}ms")
+    if not args.no_save:
+        save(records, args.results, commit)
+    return 1 if any(r.get("superlinear") for r in records) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""NYSE-style trading calendar with vectorized session lookups.
+
+Strategies re-derive calendar facts from bar dates on every call: month end
+as ``today.month != (today + timedelta(days=2)).month`` (4d656582,
+68c79d45), rebalance keys on ``(year, month)`` (89608fef), "first bar on or
+after the 14th" (the fixed-weight family). ``TradingCalendar`` computes the
+sessions of a date range once, from the holiday table below, together with
+each session's position inside its week, month, quarter and year, so
+any such question about any number of timestamps is one array lookup:
+
+    cal = nyse()
+    cal.is_last(dates, "month")        # last session of the month
+    cal.nth_day(dates, "quarter")      # 1-based session number in quarter
+    cal.close_time(dates)              # 16:00, or 13:00 on early closes
+
+``dates`` may be anything ``pd.to_datetime`` accepts (bar date strings,
+``datetime`` objects, a ``DatetimeIndex``); intraday timestamps are looked up
+by their calendar day. Days outside the calendar's range or not a session
+give ``-1`` / ``False`` / ``NaT``.
+
+Holidays follow the current NYSE rules (New Year's Day, Martin Luther King
+Jr. Day from 1998, Washington's Birthday, Good Friday, Memorial Day,
+Juneteenth from 2022, Independence Day, Labor Day, Thanksgiving, Christmas;
+Sunday holidays move to Monday, Saturday holidays to Friday except New
+Year's Day) plus the unscheduled closures in ``SPECIAL_CLOSURES``. Early
+closes (13:00) are the day after Thanksgiving and July 3 / December 24 when
+they fall on Monday to Thursday. Earlier decades had a few more one-off
+closures and half days than listed here.
+"""
+import datetime
+import functools
+
+import numpy as np
+import pandas as pd
+
+
+OPEN = datetime.time(9, 30)
+CLOSE = datetime.time(16, 0)
+EARLY_CLOSE = datetime.time(13, 0)
+PERIODS = ("week", "month", "quarter", "year")
+
+SPECIAL_CLOSURES = (
+    "1985-09-27",                                        # Hurricane Gloria
+    "1994-04-27",                                        # Nixon funeral
+    "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14",
+    "2004-06-11",                                        # Reagan funeral
+    "2007-01-02",                                        # Ford funeral
+    "2012-10-29", "2012-10-30",                          # Hurricane Sandy
+    "2018-12-05",                                        # Bush funeral
+    "2025-01-09",                                        # Carter funeral
+)
+_SPECIAL = [datetime.date.fromisoformat(d) for d in SPECIAL_CLOSURES]
+
+
+# ---------------------------------------------------------------------- #
+# Holiday table                                                          #
+# ---------------------------------------------------------------------- #
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return datetime.date(year, month, day)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """``n``-th (1-based; -1 for the last) ``weekday`` of a month."""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        shift = (weekday - first.weekday()) % 7
+        return first + datetime.timedelta(days=shift + 7 * (n - 1))
+    nxt = datetime.date(year + month // 12, month % 12 + 1, 1)
+    last = nxt - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day, saturday=True):
+    if day.weekday() == 6:
+        return day + datetime.timedelta(days=1)
+    if day.weekday() == 5:
+        return day - datetime.timedelta(days=1) if saturday else None
+    return day
+
+
+def holidays(year):
+    """Full-day market holidays of ``year``."""
+    days = [
+        _observed(datetime.date(year, 1, 1), saturday=False),
+        _nth_weekday(year, 2, 0, 3),
+        _easter(year) - datetime.timedelta(days=2),
+        _nth_weekday(year, 5, 0, -1),
+        _observed(datetime.date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),
+        _nth_weekday(year, 11, 3, 4),
+        _observed(datetime.date(year, 12, 25)),
+    ]
+    if year >= 1998:
+        days.append(_nth_weekday(year, 1, 0, 3))
+    if year >= 2022:
+        days.append(_observed(datetime.date(year, 6, 19)))
+    days += [d for d in _SPECIAL if d.year == year]
+    return sorted(d for d in days if d is not None)
+
+
+def early_closes(year):
+    """13:00 closes of ``year``."""
+    days = [_nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1)]
+    for month, day in ((7, 3), (12, 24)):
+        date = datetime.date(year, month, day)
+        if date.weekday() <= 3:
+            days.append(date)
+    return sorted(days)
+
+
+# ---------------------------------------------------------------------- #
+# Calendar                                                               #
+# ---------------------------------------------------------------------- #
+
+def _day_numbers(dates):
+    index = pd.DatetimeIndex(pd.to_datetime(dates))
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    days = index.normalize().asi8 // 86_400_000_000_000
+    return days, index.isna()
+
+
+def _period_keys(index, period):
+    if period == "week":
+        # Monday-anchored week number
+        return (index.asi8 // 86_400_000_000_000 + 3) // 7
+    year = index.year.to_numpy()
+    if period == "month":
+        return year * 12 + index.month.to_numpy()
+    if period == "quarter":
+        return year * 4 + (index.month.to_numpy() - 1) // 3
+    if period == "year":
+        return year
+    raise ValueError(f"period must be one of {PERIODS}")
+
+
+class TradingCalendar:
+    """Sessions between ``start`` and ``end`` (inclusive years), with each
+    session's rank inside every period precomputed."""
+
+    def __init__(self, start=1980, end=2035):
+        self.start, self.end = int(start), int(end)
+        days = pd.bdate_range(f"{self.start}-01-01", f"{self.end}-12-31")
+        closed = pd.DatetimeIndex([d for y in range(self.start, self.end + 1)
+                                   for d in holidays(y)])
+        self.holidays = closed
+        self.sessions = days[~days.isin(closed)]
+        self.early_closes = pd.DatetimeIndex(
+            [d for y in range(self.start, self.end + 1)
+             for d in early_closes(y)]).intersection(self.sessions)
+
+        # day number -> session ordinal (-1 on non-sessions)
+        numbers = self.sessions.asi8 // 86_400_000_000_000
+        self._day0 = int(numbers[0])
+        self._ordinal = np.full(int(numbers[-1]) - self._day0 + 1, -1,
+                                dtype=np.int64)
+        self._ordinal[numbers - self._day0] = np.arange(len(numbers))
+        self._early = self.sessions.isin(self.early_closes)
+
+        # per period: 0-based rank in the period and sessions left after it
+        n = len(self.sessions)
+        self._rank, self._left = {}, {}
+        for period in PERIODS:
+            key = _period_keys(self.sessions, period)
+            new = np.ones(n, dtype=bool)
+            new[1:] = key[1:] != key[:-1]
+            starts = np.flatnonzero(new)
+            group = np.cumsum(new) - 1
+            ends = np.append(starts[1:], n) - 1
+            position = np.arange(n)
+            self._rank[period] = position - starts[group]
+            self._left[period] = ends[group] - position
+
+    def __repr__(self):
+        return (f"TradingCalendar({self.start}-{self.end}, "
+                f"{len(self.sessions)} sessions)")
+
+    def session_index(self, dates):
+        """Session ordinal of each date's calendar day, -1 if the day is
+        not a session (or outside the calendar)."""
+        days, missing = _day_numbers(dates)
+        pos = days - self._day0
+        inside = (pos >= 0) & (pos < len(self._ordinal)) & ~missing
+        out = np.full(len(days), -1, dtype=np.int64)
+        out[inside] = self._ordinal[pos[inside]]
+        return out
+
+    def is_session(self, dates):
+        return self.session_index(dates) >= 0
+
+    def _lookup(self, table, dates, fill):
+        if table is None:
+            raise ValueError(f"period must be one of {PERIODS}")
+        ordinal = self.session_index(dates)
+        out = np.full(len(ordinal), fill, dtype=np.int64)
+        valid = ordinal >= 0
+        out[valid] = table[ordinal[valid]]
+        return out
+
+    def nth_day(self, dates, period="month"):
+        """1-based number of the session within its period (0 off-calendar)."""
+        rank = self._rank.get(period)
+        return self._lookup(None if rank is None else rank + 1, dates, 0)
+
+    def days_left(self, dates, period="month"):
+        """Sessions left in the period after this one (-1 off-calendar)."""
+        return self._lookup(self._left.get(period), dates, -1)
+
+    def is_first(self, dates, period="month"):
+        """First session of its week / month / quarter / year."""
+        return self.nth_day(dates, period) == 1
+
+    def is_last(self, dates, period="month"):
+        """Last session of its week / month / quarter / year."""
+        return self.days_left(dates, period) == 0
+
+    def _session_times(self, dates, fallback):
+        ordinal = self.session_index(dates)
+        day = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+        if day.tz is not None:
+            day = day.tz_localize(None)
+        offset = np.full(len(ordinal), np.timedelta64("NaT"),
+                         dtype="timedelta64[ns]")
+        valid = ordinal >= 0
+        offset[valid] = fallback(ordinal[valid])
+        return day + pd.TimedeltaIndex(offset)
+
+    def open_time(self, dates):
+        """Session open of each date's day (NaT on non-sessions)."""
+        at = pd.Timedelta(hours=OPEN.hour, minutes=OPEN.minute).to_timedelta64()
+        return self._session_times(dates, lambda ordinal: at)
+
+    def close_time(self, dates):
+        """Session close of each date's day, early closes included."""
+        full = pd.Timedelta(hours=CLOSE.hour).to_timedelta64()
+        early = pd.Timedelta(hours=EARLY_CLOSE.hour).to_timedelta64()
+        return self._session_times(
+            dates, lambda ordinal: np.where(self._early[ordinal], early, full))
+
+    def sessions_between(self, start, end):
+        """Sessions from ``start`` to ``end`` inclusive."""
+        return self.sessions[(self.sessions >= pd.Timestamp(start))
+                             & (self.sessions <= pd.Timestamp(end))]
+
+
+@functools.lru_cache(maxsize=None)
+def nyse(start=1980, end=2035):
+    """Shared ``TradingCalendar`` (built once per range)."""
+    return TradingCalendar(start, end)
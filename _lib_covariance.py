@@ -0,0 +1,166 @@
+"""Rolling return covariance updated one bar at a time.
+
+Volatility and covariance estimates in the strategies are recomputed from
+the close history on every call (``realized_vol`` per asset in 873477d1 and
+3062169d, per-sleeve mean/variance loops in 89608fef, ``STDEV`` in
+26e45049), and the correlation penalty of ed6b86dd, 46249f2a, 824c3b23 and
+9594fe92 builds a returns DataFrame and its full ``corr()`` every bar to
+read one column of it. ``RollingCovariance`` keeps the window's running sums instead:
+the return vector sum and the cross-product matrix ``sum(r r')``. A new bar
+adds one outer product and the bar leaving the window subtracts one, so an
+update is O(assets^2) whatever the window length, and the covariance,
+volatilities and correlations are read off the sums in one pass; a
+single pair (``corr(a, b)``) or one asset against all (``corr_with(top)``)
+costs O(1) / O(assets). The sums
+are rebuilt exactly from the held window every ``window`` updates, which
+bounds the rounding drift of the add/subtract updates.
+
+Bars with a missing (non-finite) return for any asset are skipped as a
+whole, so every estimate is over the same bars (listwise deletion); feed
+each universe separately if assets list on different dates.
+
+    cov = RollingCovariance(tickers, window=63)
+    ...
+    cov.push_prices(panel.last("close"))    # or push(returns)
+    sigma = cov.covariance()
+    vols = cov.volatility(annualize=252)
+    penalty = np.maximum(cov.corr_with("SPY"), 0.0)
+"""
+import numpy as np
+import pandas as pd
+
+
+class RollingCovariance:
+    """Covariance of the last ``window`` complete return vectors."""
+
+    def __init__(self, tickers, window, ddof=1):
+        self.tickers = list(tickers)
+        self.window = int(window)
+        if self.window < 2:
+            raise ValueError("window must be at least 2")
+        self.ddof = ddof
+        self._col = {t: i for i, t in enumerate(self.tickers)}
+        n = len(self.tickers)
+        self._buf = np.zeros((self.window, n))
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._n = 0            # vectors pushed
+        self._prices = None
+
+    def __len__(self):
+        """Return vectors currently in the window."""
+        return min(self._n, self.window)
+
+    @property
+    def ready(self):
+        return self._n >= self.window
+
+    def push(self, returns):
+        """Add one return vector aligned with ``tickers``; returns False if
+        it was skipped for holding a non-finite value."""
+        r = np.asarray(returns, dtype=float)
+        if not np.isfinite(r).all():
+            return False
+        slot = self._n % self.window
+        if self._n >= self.window:
+            old = self._buf[slot]
+            self._sum -= old
+            self._cross -= np.outer(old, old)
+        self._buf[slot] = r
+        self._sum += r
+        self._cross += np.outer(r, r)
+        self._n += 1
+        if self._n % self.window == 0:
+            # exact rebuild once per window
+            self._sum = self._buf.sum(axis=0)
+            self._cross = self._buf.T @ self._buf
+        return True
+
+    def push_prices(self, prices):
+        """Add the simple returns from the previous ``push_prices`` call to
+        these prices."""
+        prices = np.asarray(prices, dtype=float)
+        previous, self._prices = self._prices, prices.copy()
+        if previous is None:
+            return False
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.where(previous > 0, prices / previous - 1.0, np.nan)
+        return self.push(returns)
+
+    def mean(self):
+        return self._sum / max(len(self), 1)
+
+    def covariance(self):
+        """assets x assets covariance (NaN until ``ddof + 1`` vectors)."""
+        n = len(self)
+        if n <= self.ddof:
+            return np.full(self._cross.shape, np.nan)
+        cov = (self._cross - np.outer(self._sum, self._sum) / n) \
+            / (n - self.ddof)
+        # rounding can leave tiny negative variances for flat series
+        np.fill_diagonal(cov, np.maximum(np.diag(cov), 0.0))
+        return cov
+
+    def volatility(self, annualize=None):
+        vol = np.sqrt(np.diag(self.covariance()))
+        return vol * np.sqrt(annualize) if annualize else vol
+
+    def correlation(self):
+        """Correlation matrix; NaN rows/columns for zero-variance assets."""
+        cov = self.covariance()
+        sd = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(sd, sd)
+        corr[:, sd == 0] = np.nan
+        corr[sd == 0, :] = np.nan
+        np.fill_diagonal(corr, np.where(sd > 0, 1.0, np.nan))
+        return corr
+
+    def _pair(self, i, j):
+        n = len(self)
+        if n <= self.ddof:
+            return np.nan
+        return (self._cross[i, j] - self._sum[i] * self._sum[j] / n) \
+            / (n - self.ddof)
+
+    def corr(self, a, b):
+        """Correlation of two tickers from the running sums (NaN if either
+        has zero variance)."""
+        i, j = self._col[a], self._col[b]
+        var = max(self._pair(i, i), 0.0) * max(self._pair(j, j), 0.0)
+        return self._pair(i, j) / np.sqrt(var) if var > 0 else np.nan
+
+    def corr_with(self, ticker):
+        """Correlation of every ticker with ``ticker`` (one row of
+        ``correlation()`` without forming the matrix)."""
+        n = len(self)
+        if n <= self.ddof:
+            return np.full(len(self.tickers), np.nan)
+        j = self._col[ticker]
+        cov = (self._cross[:, j] - self._sum * self._sum[j] / n) \
+            / (n - self.ddof)
+        var = np.maximum((np.diag(self._cross) - self._sum ** 2 / n)
+                         / (n - self.ddof), 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = cov / np.sqrt(var * var[j])
+        out[(var == 0) | (var[j] == 0)] = np.nan
+        return out
+
+    def frame(self, kind="covariance"):
+        values = self.correlation() if kind == "correlation" \
+            else self.covariance()
+        return pd.DataFrame(values, index=self.tickers, columns=self.tickers)
+
+
+def covariance_from_closes(closes, window, ddof=1):
+    """Covariance of the last ``window`` complete simple-return vectors of a
+    tickers x bars close array (the batch counterpart of pushing every bar
+    through ``RollingCovariance.push_prices``)."""
+    closes = np.asarray(closes, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prev = closes[:, :-1]
+        returns = np.where(prev > 0, closes[:, 1:] / prev - 1.0, np.nan)
+    complete = returns[:, np.isfinite(returns).all(axis=0)][:, -window:]
+    if complete.shape[1] <= ddof:
+        return np.full((len(closes), len(closes)), np.nan)
+    return np.cov(complete, ddof=ddof)
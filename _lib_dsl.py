@@ -0,0 +1,326 @@
+"""Vectorized evaluator for the JSON strategy DSL (``main.json``).
+
+A DSL strategy is a list of nodes evaluated in order on every bar::
+
+    {"type": "IF",
+     "conditions": [{"type": "BINARY", "first": <operand>, "comp": "<",
+                     "second": <operand>, "operator": ""}, ...],
+     "if_action": <node>, "else_action": <node>}
+
+    {"type": "ACTION",
+     "steps": [{"action": "allocation", "asset": "WIMA", "amount": "100"}]}
+
+Operands are indicators (``{"name": "EMA", "args": {"ticker": "WIMA",
+"length": "10"}}``), raw bar fields (``{"name": "close", "args": {"ticker":
+...}}``) or constants (a number, a numeric string or ``{"value": x}``).
+Conditions after the first are joined by their ``operator`` (``AND`` /
+``OR``, left to right). Amounts are percentages; an asset set by a later
+node overrides an earlier one.
+
+``compile_strategy`` turns the tree into closures over whole-history
+arrays. Every distinct indicator is computed once over the full panel by
+the same series functions as ``_lib_indicators`` (all of them causal, so
+element ``k`` equals the indicator evaluated on bars ``0..k``), each
+condition becomes one boolean mask and each ``IF`` one ``np.where``. A full
+backtest is therefore a few array operations per node instead of one tree
+walk per bar. A bar on which any operand the tree looks at is still
+undefined (indicator warm-up, ticker absent) gives no allocation.
+
+    strategy = JSONStrategy.load("ccf73499-.../main.json")
+    weights, defined = strategy.compiled.evaluate(panel)
+"""
+import json
+import operator
+import sys
+
+import numpy as np
+import pandas as pd
+
+from _lib_indicators import (_HLCV, _bb, _ema, _mfi, _momentum, _rma,
+                             _rsi, _slope, _sma, _stdev, _true_range, _vwap)
+from _lib_panel import FIELDS, OHLCVPanel, _bar_date
+
+
+COMPARATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt,
+               ">=": operator.ge, "==": operator.eq, "=": operator.eq,
+               "!=": operator.ne}
+
+
+# ---------------------------------------------------------------------- #
+# Indicators over whole-history series                                   #
+# ---------------------------------------------------------------------- #
+
+def _atr(high, low, close, length):
+    # pandas_ta adds machine epsilon to every bar's range once any bar in the
+    # history has high == low; on a prefix that only holds from the first
+    # such bar on, so splice the two variants at that bar
+    zero = np.flatnonzero((high - low).to_numpy() == 0)
+    with_eps = _rma(_true_range(high, low, close), length)
+    if not len(zero) or zero[0] == 0:
+        return with_eps
+    high_low = high - low
+    prev_close = close.shift(1)
+    tr = pd.concat([high_low, high - prev_close, prev_close - low], axis=1)
+    tr = tr.abs().max(axis=1)
+    tr.iloc[:1] = np.nan
+    plain = _rma(tr, length)
+    plain.iloc[zero[0]:] = with_eps.iloc[zero[0]:]
+    return plain
+
+
+def _bb_band(close, length, std, band="mid"):
+    if band == "mid":
+        return _sma(close, length)
+    return _bb(close, length, std)[band]
+
+
+# name -> (series function, bar fields it reads, DSL parameters)
+INDICATORS = {
+    "SMA": (_sma, ("close",), ("length",)),
+    "EMA": (_ema, ("close",), ("length",)),
+    "RSI": (_rsi, ("close",), ("length",)),
+    "ATR": (_atr, ("high", "low", "close"), ("length",)),
+    "VWAP": (_vwap, _HLCV, ("length",)),
+    "STDEV": (_stdev, ("close",), ("length",)),
+    "BB": (_bb_band, ("close",), ("length", "std", "band")),
+    "Momentum": (_momentum, ("close",), ("length",)),
+    "Slope": (_slope, ("close",), ("length",)),
+    "MFI": (_mfi, _HLCV, ("length",)),
+}
+
+
+def _number(value):
+    if isinstance(value, (int, float)):
+        return value
+    value = str(value).strip()
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def indicator_array(panel, name, ticker, params):
+    """Whole-history values of one indicator for one ticker, aligned with
+    the panel's bars (NaN where the ticker has no bar)."""
+    row = panel.row(ticker)
+    present = panel.mask[row]
+    if name in FIELDS:
+        return np.where(present, panel.field(name)[row], np.nan)
+    fn, fields = INDICATORS[name][:2]
+    cols = [pd.Series(panel.field(f)[row][present], dtype="float64")
+            for f in fields]
+    length = params.get("length")
+    out = np.full(len(panel), np.nan)
+    if length is not None and present.sum() < length:
+        return out
+    out[present] = fn(*cols, **params).to_numpy(dtype=float)
+    return out
+
+
+# ---------------------------------------------------------------------- #
+# Compilation                                                            #
+# ---------------------------------------------------------------------- #
+
+class CompiledStrategy:
+    """A DSL tree compiled into array closures; ``evaluate(panel)`` returns
+    ``(weights, defined)``: bars x assets weights (NaN where the tree sets
+    nothing) and the bars on which the tree could be evaluated."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.assets = list(spec.get("assets", []))
+        self.interval = spec.get("interval", "1day")
+        if spec.get("groups"):
+            raise ValueError("DSL asset groups are not supported")
+        self.indicators = {}   # key -> (name, ticker, params)
+        self._column = {a: i for i, a in enumerate(self.assets)}
+        self._root = self._sequence(spec.get("strategy", []))
+
+    # operands -------------------------------------------------------------
+
+    def _operand(self, node):
+        if isinstance(node, dict) and "name" in node:
+            args = dict(node.get("args") or {})
+            name = node["name"]
+            if name not in INDICATORS and name not in FIELDS:
+                raise ValueError(f"unsupported DSL indicator {name!r}")
+            ticker = args.pop("ticker")
+            if name in INDICATORS:
+                allowed = INDICATORS[name][2]
+                params = {k: (v if k == "band" else _number(v))
+                          for k, v in args.items() if k in allowed}
+            else:
+                params = {}
+            key = (name, ticker) + tuple(sorted(params.items()))
+            self.indicators[key] = (name, ticker, params)
+            return lambda arrays: arrays[key]
+        if isinstance(node, dict):
+            node = node.get("value")
+        value = float(_number(node))
+        return lambda arrays: value
+
+    def _condition(self, cond):
+        if cond.get("type", "BINARY") != "BINARY":
+            raise ValueError(f"unsupported DSL condition {cond.get('type')!r}")
+        compare = COMPARATORS[cond["comp"].strip()]
+        first = self._operand(cond["first"])
+        second = self._operand(cond["second"])
+
+        def evaluate(arrays, n):
+            a, b = first(arrays), second(arrays)
+            defined = np.broadcast_to(~(np.isnan(a) | np.isnan(b)), (n,))
+            with np.errstate(invalid="ignore"):
+                return np.broadcast_to(compare(a, b), (n,)), defined
+        return evaluate
+
+    # nodes ----------------------------------------------------------------
+
+    def _node(self, node):
+        kind = node.get("type")
+        if kind == "IF":
+            return self._if(node)
+        if kind == "ACTION":
+            return self._action(node)
+        raise ValueError(f"unsupported DSL node {kind!r}")
+
+    def _sequence(self, nodes):
+        parts = [self._node(n) for n in nodes]
+
+        def evaluate(arrays, n):
+            weights = np.full((n, len(self.assets)), np.nan)
+            defined = np.ones(n, dtype=bool)
+            for part in parts:
+                w, d = part(arrays, n)
+                weights = np.where(np.isnan(w), weights, w)
+                defined &= d
+            return weights, defined
+        return evaluate
+
+    def _action(self, node):
+        row = np.full(len(self.assets), np.nan)
+        for step in node.get("steps", []):
+            if step.get("action") != "allocation":
+                raise ValueError(f"unsupported DSL action "
+                                 f"{step.get('action')!r}")
+            asset = step["asset"]
+            if asset not in self._column:
+                self._column[asset] = len(self.assets)
+                self.assets.append(asset)
+                row = np.append(row, np.nan)
+            row[self._column[asset]] = _number(step["amount"]) / 100.0
+
+        def evaluate(arrays, n):
+            full = np.full(len(self.assets), np.nan)
+            full[:len(row)] = row
+            return np.broadcast_to(full, (n, len(self.assets))), \
+                np.ones(n, dtype=bool)
+        return evaluate
+
+    def _if(self, node):
+        if not node.get("conditions"):
+            raise ValueError("DSL IF node without conditions")
+        conditions = [(str(c.get("operator", "")).strip().upper(),
+                       self._condition(c)) for c in node["conditions"]]
+        then = self._node(node["if_action"])
+        other = self._node(node.get("else_action")
+                           or {"type": "ACTION", "steps": []})
+
+        def evaluate(arrays, n):
+            mask, defined = None, np.ones(n, dtype=bool)
+            for op, cond in conditions:
+                m, d = cond(arrays, n)
+                defined = defined & d
+                if mask is None:
+                    mask = m
+                elif op == "OR":
+                    mask = mask | m
+                else:
+                    mask = mask & m
+            w_then, d_then = then(arrays, n)
+            w_else, d_else = other(arrays, n)
+            weights = np.where(mask[:, None], w_then, w_else)
+            return weights, defined & np.where(mask, d_then, d_else)
+        return evaluate
+
+    # evaluation -----------------------------------------------------------
+
+    def indicator_arrays(self, panel):
+        return {key: indicator_array(panel, *spec)
+                for key, spec in self.indicators.items()}
+
+    def evaluate(self, panel):
+        return self._root(self.indicator_arrays(panel), len(panel))
+
+    def allocations(self, panel):
+        """Per-bar allocation dicts (``None`` where undefined)."""
+        weights, defined = self.evaluate(panel)
+        out = []
+        for row, ok in zip(weights.tolist(), defined.tolist()):
+            if not ok:
+                out.append(None)
+                continue
+            out.append({a: w for a, w in zip(self.assets, row) if w == w})
+        return out
+
+
+def compile_strategy(spec):
+    return CompiledStrategy(spec)
+
+
+# ---------------------------------------------------------------------- #
+# Strategy adapter                                                       #
+# ---------------------------------------------------------------------- #
+
+class JSONStrategy:
+    """``TradingStrategy``-shaped wrapper around a compiled DSL tree.
+
+    ``prepare(bars)`` evaluates the whole replay history once; ``run(data)``
+    then looks the allocation up by bar index. Without ``prepare`` (or if
+    the history stops matching) ``run`` re-evaluates the history it is
+    given."""
+
+    def __init__(self, spec):
+        self.compiled = compile_strategy(spec)
+        self._dates = []
+        self._allocations = []
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @property
+    def assets(self):
+        return self.compiled.assets
+
+    @property
+    def interval(self):
+        return self.compiled.interval
+
+    @property
+    def data(self):
+        return []
+
+    def prepare(self, bars):
+        panel = OHLCVPanel.from_ohlcv(bars, tickers=self.assets)
+        self._dates = panel.dates
+        self._allocations = self.compiled.allocations(panel)
+
+    def run(self, data):
+        ohlcv = data["ohlcv"]
+        k = len(ohlcv) - 1
+        if k < 0:
+            return None
+        if k >= len(self._dates) or self._dates[k] != _bar_date(ohlcv[-1]):
+            self.prepare(ohlcv)
+        allocation = self._allocations[k]
+        if allocation is None:
+            return None
+        return _target_allocation(allocation)
+
+
+def _target_allocation(allocation):
+    base_class = sys.modules.get("surmount.base_class")
+    if base_class is None:
+        return allocation
+    return base_class.TargetAllocation(allocation)
@@ -0,0 +1,328 @@
+"""Intraday fill simulation: bracket exits resolved against bar high/low.
+
+The hourly strategies emulate intrabar exits with allocations: e8a442ee
+(opening-range breakout, 5% of daily ATR stop or 10R target), f04579df
+(2x ATR stop, 2R target, flat at 15:30), f3e26c2f (SPY signal, QQQ
+execution) and d335a535 (13:00 V-shape). In a replay a position only
+changes at a bar close, so a stop traded through mid-bar is "filled" at
+the close of the bar that touched it, an overnight gap through the stop is
+invisible and fills cost nothing. This module simulates the orders
+instead, from a table of trades with one row per trade:
+
+    entry      bar index of the entry (filled at that bar's open)
+    direction  +1 long, -1 short
+    stop       stop price (NaN: none)
+    target     limit price (NaN: none)
+    exit_by    bar index whose close (or open, see ``FillModel.eod``)
+               flattens a trade still open — the end-of-day exit
+    size       fraction of equity (optional, default 1)
+
+``simulate`` resolves every trade at once. Trades are laid out as rows of
+a trades x bars window (at most a session long for day trades), the first
+bar touching the stop and the first touching the target are found with one
+``argmax`` each, and the exit price follows the ``FillModel``: stops fill at
+their level or, when the bar opens beyond it, at the open; targets fill at
+their level or a better open; a bar touching both is resolved
+conservatively (stop first) unless told otherwise; every fill pays
+``slippage``. Ten years of hourly bars are a few thousand sessions, so a
+full simulation is milliseconds of NumPy.
+
+``opening_range_trades`` builds the table for the opening-range family from
+a ``SessionIndex`` (first bar's candle sets the direction, entry at the
+next bar's open, stop at the range or at a multiple of the lagged daily
+ATR, optional R-multiple target, flatten time) out of the per-session
+arrays of ``opening_ranges``, with ``daily_atr_pct``
+giving e8a442ee's lagged 14-day ATR per session. Strategies with other
+entries (f3e26c2f's breakout, d335a535's 13:00 V-shape) fill the table
+from their own signal and reuse ``simulate``:
+
+    prices = price_arrays(bars, "TQQQ")
+    sessions = SessionIndex()
+    sessions.sync(bars)
+    atr = daily_atr_pct(prices, sessions, 14)
+    trades = opening_range_trades(prices, sessions, stop_pct=0.05 * atr,
+                                  flatten="15:55")
+    fills = simulate(prices, trades, FillModel(slippage=0.0005))
+    stats = summary(fills)
+"""
+import numpy as np
+import pandas as pd
+
+from _lib_bars import _as_minute
+from _lib_panel import OHLCVPanel
+
+
+class FillModel:
+    """Fill assumptions for ``simulate``.
+
+    ``slippage`` is the fraction of price lost on every fill (entry and
+    exit). With ``gaps`` a stop whose bar opens beyond the stop fills at the
+    open, and a target at the open when that is better; without it both
+    fill at their level. ``same_bar`` ("stop" or "target") decides a bar
+    that touches both. ``entry_bar`` lets the entry bar's own range trigger
+    the exits. ``eod`` ("close" or "open") is the price of the ``exit_by``
+    bar used to flatten; with "open" that bar's range no longer triggers
+    the stop or target."""
+
+    def __init__(self, slippage=0.0, gaps=True, same_bar="stop",
+                 entry_bar=True, eod="close"):
+        if same_bar not in ("stop", "target"):
+            raise ValueError("same_bar must be 'stop' or 'target'")
+        if eod not in ("close", "open"):
+            raise ValueError("eod must be 'close' or 'open'")
+        self.slippage = float(slippage)
+        self.gaps = gaps
+        self.same_bar = same_bar
+        self.entry_bar = entry_bar
+        self.eod = eod
+
+
+# ---------------------------------------------------------------------- #
+# Inputs                                                                 #
+# ---------------------------------------------------------------------- #
+
+def price_arrays(ohlcv, ticker):
+    """``{"open", "high", "low", "close"}`` arrays of one ticker over a
+    ``data["ohlcv"]`` list (NaN on bars without it)."""
+    panel = OHLCVPanel.from_ohlcv(ohlcv, [ticker])
+    return {f: panel.field(f)[0].copy()
+            for f in ("open", "high", "low", "close")}
+
+
+def flatten_bars(sessions, flatten=None):
+    """Per session, the bar that flattens it: the first bar at or after
+    ``flatten`` (``"HH:MM"``), else the session's last bar."""
+    starts = np.asarray(sessions.starts, dtype=np.int64)
+    stops = np.append(starts[1:], len(sessions)) - 1
+    if flatten is None:
+        return stops
+    bars = np.arange(len(sessions))
+    late = np.where(sessions.minutes >= _as_minute(flatten), bars,
+                    len(sessions))
+    first = np.minimum.reduceat(late, starts)
+    return np.where(first <= stops, first, stops)
+
+
+def daily_atr_pct(prices, sessions, period=14):
+    """Per session, the ``period``-day average true range of the sessions
+    before it divided by the previous session's close (NaN with fewer than
+    ``period + 1`` prior sessions) — e8a442ee's lagged daily ATR."""
+    starts = np.asarray(sessions.starts, dtype=np.int64)
+    stops = np.append(starts[1:], len(sessions)) - 1
+    high = np.fmax.reduceat(prices["high"], starts)
+    low = np.fmin.reduceat(prices["low"], starts)
+    close = prices["close"][stops]
+    prev = close[:-1]
+    tr = np.maximum(high[1:] - low[1:], np.maximum(np.abs(high[1:] - prev),
+                                                   np.abs(low[1:] - prev)))
+    atr = pd.Series(tr).rolling(period).mean().to_numpy()
+    out = np.full(len(starts), np.nan)
+    # session i: true ranges of sessions 1 .. i - 1 over the close of i - 1
+    out[2:] = atr[:-1] / close[1:-1]
+    return out
+
+
+def target_multiple(target_r):
+    """``target_r`` as a float, NaN for no target (None or 0)."""
+    if target_r is None or target_r == 0:
+        return np.nan
+    if not target_r > 0:
+        raise ValueError("target_r must be positive (None or 0: no target)")
+    return float(target_r)
+
+
+def opening_ranges(prices, sessions, range_bars=1):
+    """Per-session opening-range arrays shared by every parameter set:
+    ``entry`` (bar index of the bar after the range), ``entry_price`` (its
+    open, NaN when the session has no such bar), ``direction`` (sign of the
+    range candle, 0 on a doji) and the range's ``high`` and ``low``."""
+    starts = np.asarray(sessions.starts, dtype=np.int64)
+    stops = np.append(starts[1:], len(sessions)) - 1
+    entry = starts + range_bars
+    last = np.minimum(entry - 1, stops)
+
+    window = np.minimum(starts[:, None] + np.arange(range_bars),
+                        last[:, None])
+    direction = np.sign(prices["close"][last] - prices["open"][starts])
+    direction = np.nan_to_num(direction).astype(np.int64)
+    inside = entry <= stops
+    entry_price = np.full(len(starts), np.nan)
+    entry_price[inside] = prices["open"][entry[inside]]
+    return {
+        "entry": entry,
+        "entry_price": entry_price,
+        "direction": np.where(inside, direction, 0),
+        "high": np.nanmax(prices["high"][window], axis=1),
+        "low": np.nanmin(prices["low"][window], axis=1),
+    }
+
+
+def orb_brackets(orb, exit_by, stop_pct=np.nan, range_stop=True,
+                 target_r=np.nan, long_only=False):
+    """Stop and target levels for the ``opening_ranges`` arrays ``orb``.
+
+    Where ``range_stop`` holds the stop is the far side of the range,
+    elsewhere ``stop_pct`` (a fraction of the entry) away from the entry;
+    the target is ``target_r`` stop widths away (NaN: none). ``exit_by``,
+    ``stop_pct``, ``range_stop`` and ``target_r`` broadcast against the
+    sessions axis, so leading axes evaluate several parameter sets at once.
+    Returns ``direction``, ``width``, ``stop``, ``target`` and ``ok`` (a
+    session that trades: a direction, an entry by ``exit_by`` and a
+    positive stop width)."""
+    entry, entry_price = orb["entry"], orb["entry_price"]
+    direction = orb["direction"]
+    if long_only:
+        direction = np.maximum(direction, 0)
+    range_width = np.where(direction > 0, entry_price - orb["low"],
+                           orb["high"] - entry_price)
+    width = np.where(range_stop, range_width,
+                     np.asarray(stop_pct, dtype=float) * entry_price)
+    with np.errstate(invalid="ignore"):
+        ok = (direction != 0) & (entry <= exit_by) & (width > 0)
+    return {
+        "direction": direction,
+        "width": width,
+        "stop": entry_price - direction * width,
+        "target": entry_price + direction * target_r * width,
+        "ok": ok,
+    }
+
+
+def opening_range_trades(prices, sessions, range_bars=1, stop_pct=None,
+                         target_r=None, flatten=None, long_only=False):
+    """One opening-range trade per session as a trades DataFrame.
+
+    The candle of the first ``range_bars`` bars sets the direction (none on
+    a doji); the entry is the open of the next bar. The stop is
+    ``stop_pct`` (scalar or per-session array, a fraction of the entry)
+    away from the entry, or the far side of the range when ``stop_pct`` is
+    None. ``target_r`` places a target that many stop widths away (None or
+    0: no target). ``long_only`` skips bearish ranges."""
+    orb = opening_ranges(prices, sessions, range_bars)
+    exit_by = flatten_bars(sessions, flatten)
+    levels = orb_brackets(
+        orb, exit_by,
+        stop_pct=np.nan if stop_pct is None else stop_pct,
+        range_stop=stop_pct is None,
+        target_r=target_multiple(target_r), long_only=long_only)
+    ok = levels["ok"]
+    return pd.DataFrame({
+        "session": np.flatnonzero(ok),
+        "entry": orb["entry"][ok],
+        "direction": levels["direction"][ok],
+        "stop": levels["stop"][ok],
+        "target": levels["target"][ok],
+        "exit_by": exit_by[ok],
+    })
+
+
+# ---------------------------------------------------------------------- #
+# Simulation                                                             #
+# ---------------------------------------------------------------------- #
+
+def _first(hit):
+    """Column of the first True per row, and whether there is one."""
+    return hit.argmax(axis=1), hit.any(axis=1)
+
+
+def simulate(prices, trades, model=None):
+    """Resolve every trade of ``trades`` and return it with ``entry_price``,
+    ``exit_bar``, ``exit_price``, ``reason`` ("stop", "target" or "eod")
+    and the net return ``ret`` added."""
+    model = model or FillModel()
+    fills = pd.DataFrame(trades).reset_index(drop=True)
+    if "size" not in fills:
+        fills["size"] = 1.0
+    if fills.empty:
+        for column in ("entry_price", "exit_bar", "exit_price", "reason",
+                       "ret"):
+            fills[column] = pd.Series(dtype=object if column == "reason"
+                                      else float)
+        return fills
+
+    entry = fills["entry"].to_numpy(dtype=np.int64)
+    exit_by = fills["exit_by"].to_numpy(dtype=np.int64)
+    if np.any(exit_by < entry):
+        raise ValueError("exit_by before entry")
+    d = fills["direction"].to_numpy(dtype=float)
+    stop = fills["stop"].to_numpy(dtype=float)
+    target = fills["target"].to_numpy(dtype=float)
+    rows = np.arange(len(fills))
+
+    # trades x bars window, padded past exit_by with the exit_by bar
+    width = int((exit_by - entry).max()) + 1
+    idx = np.minimum(entry[:, None] + np.arange(width), exit_by[:, None])
+    live = entry[:, None] + np.arange(width) <= exit_by[:, None]
+    if model.eod == "open":
+        # flattened at the exit_by open, before its range can trigger exits
+        live &= entry[:, None] + np.arange(width) < exit_by[:, None]
+
+    # signed prices: a long's adverse move is down, a short's up, so both
+    # are "low <= stop" and "high >= target" in d * price
+    sign = d[:, None]
+    o = prices["open"][idx] * sign
+    high, low = prices["high"][idx], prices["low"][idx]
+    long = sign > 0
+    up = np.where(long, high, -low)
+    down = np.where(long, low, -high)
+    s, t = (stop * d)[:, None], (target * d)[:, None]
+
+    with np.errstate(invalid="ignore"):
+        stop_hit = live & (down <= s)
+        target_hit = live & (up >= t)
+    if not model.entry_bar:
+        stop_hit[:, 0] = target_hit[:, 0] = False
+    k_stop, any_stop = _first(stop_hit)
+    k_target, any_target = _first(target_hit)
+    k_stop = np.where(any_stop, k_stop, width)
+    k_target = np.where(any_target, k_target, width)
+
+    by_stop = k_stop < k_target
+    by_stop |= (k_stop == k_target) & any_stop & (model.same_bar == "stop")
+    by_target = any_target & ~by_stop
+    k = np.where(by_stop, k_stop, np.where(by_target, k_target,
+                                           exit_by - entry))
+
+    open_k = o[rows, k]
+    if model.gaps:
+        stop_fill = np.minimum(open_k, stop * d)
+        target_fill = np.maximum(open_k, target * d)
+    else:
+        stop_fill, target_fill = stop * d, target * d
+    eod_fill = prices[model.eod][exit_by] * d
+    exit_price = np.where(by_stop, stop_fill,
+                          np.where(by_target, target_fill, eod_fill)) * d
+
+    slip = model.slippage
+    entry_price = prices["open"][entry]
+    paid = entry_price * (1 + d * slip)
+    received = exit_price * (1 - d * slip)
+
+    fills["entry_price"] = entry_price
+    fills["exit_bar"] = entry + k
+    fills["exit_price"] = exit_price
+    fills["reason"] = np.where(by_stop, "stop",
+                               np.where(by_target, "target", "eod"))
+    fills["ret"] = d * (received / paid - 1)
+    return fills
+
+
+def summary(fills):
+    """Trade count, exit mix, win rate, compounded return and maximum
+    drawdown of ``simulate`` output (sizes as fractions of equity)."""
+    if fills.empty:
+        return {"trades": 0}
+    growth = 1 + fills["size"].to_numpy() * fills["ret"].to_numpy()
+    equity = np.cumprod(growth)
+    peak = np.maximum.accumulate(np.append(1.0, equity))[1:]
+    reasons = fills["reason"].value_counts()
+    return {
+        "trades": len(fills),
+        "stops": int(reasons.get("stop", 0)),
+        "targets": int(reasons.get("target", 0)),
+        "eod": int(reasons.get("eod", 0)),
+        "win_rate": float((fills["ret"] > 0).mean()),
+        "mean_return": float(fills["ret"].mean()),
+        "total_return": float(equity[-1] - 1),
+        "max_drawdown": float((equity / peak - 1).min()),
+    }
@@ -0,0 +1,234 @@
+"""Calendar-scheduled fixed-mix portfolios, one or thousands at a time.
+
+Fixed-mix ``main.json`` strategies (4badd984, 7d2a6357) declare only target
+weights and a rebalance cadence::
+
+    {"allocations": {"SPY": 60.0, "AGG": 40.0}, "frequency": 12,
+     "period": "months"}
+
+Between rebalances such a portfolio is pure drift, so nothing needs to be
+evaluated per bar. ``rebalance_mask(dates, frequency, period)`` marks the
+rebalance bars of a trading calendar up front: the first bar, then the first
+bar of every ``frequency``-th day / week / month / year counted from it
+(``days`` counts trading bars).
+
+``simulate(prices, portfolios)`` runs drift-only accounting for any number of
+portfolios over one close-price matrix. Portfolios that share a cadence share
+their rebalance segments; within a segment each portfolio's value is
+``weights @ (price / price at the segment start)`` plus the uninvested
+remainder, which is one matrix product per cadence for the whole group, and
+segment values are chained with a cumulative product. The accounting matches
+``_lib_replay.replay`` (weights set at a bar's close, the remainder earns
+nothing, turnover ``sum(|target - drifted|)``).
+
+``FixedMixStrategy`` exposes one portfolio through the ``TradingStrategy``
+interface for the replay runner; it returns weights on rebalance bars only.
+"""
+import numpy as np
+import pandas as pd
+
+from _lib_dsl import _target_allocation
+from _lib_panel import OHLCVPanel, _bar_date
+
+
+PERIODS = ("days", "weeks", "months", "years")
+
+
+def parse(spec):
+    """``(weights, frequency, period)`` from a fixed-mix JSON spec; weights
+    are fractions."""
+    weights = {t: float(w) / 100.0
+               for t, w in spec.get("allocations", {}).items()}
+    if not weights:
+        raise ValueError("fixed-mix spec has no allocations")
+    frequency = int(spec.get("frequency", 1))
+    period = str(spec.get("period", "months")).lower()
+    if not period.endswith("s"):
+        period += "s"
+    if period not in PERIODS or frequency < 1:
+        raise ValueError(f"unsupported rebalance cadence {frequency} "
+                         f"{period}")
+    return weights, frequency, period
+
+
+# ---------------------------------------------------------------------- #
+# Schedule                                                               #
+# ---------------------------------------------------------------------- #
+
+def _period_index(dates, period):
+    dates = pd.DatetimeIndex(dates)
+    if period == "days":
+        return np.arange(len(dates))
+    if period == "weeks":
+        # Monday-anchored week number
+        days = dates.normalize().asi8 // 86_400_000_000_000
+        return (days + 3) // 7
+    if period == "months":
+        return dates.year.to_numpy() * 12 + dates.month.to_numpy()
+    return dates.year.to_numpy()
+
+
+def rebalance_mask(dates, frequency, period):
+    """Boolean mask of the rebalance bars of a sorted trading calendar."""
+    n = len(dates)
+    if not n:
+        return np.zeros(0, dtype=bool)
+    index = _period_index(dates, period)
+    bucket = (index - index[0]) // frequency
+    mask = np.empty(n, dtype=bool)
+    mask[0] = True
+    mask[1:] = bucket[1:] != bucket[:-1]
+    return mask
+
+
+# ---------------------------------------------------------------------- #
+# Vectorized accounting                                                  #
+# ---------------------------------------------------------------------- #
+
+class FixedMixResult:
+    """Output of ``simulate``: ``equity`` is bars x portfolios, ``turnover``
+    the summed turnover per portfolio, ``rebalances`` the number of
+    rebalance bars per portfolio."""
+
+    def __init__(self, names, dates, equity, turnover, rebalances):
+        self.names = list(names)
+        self.dates = list(dates)
+        self.equity = equity
+        self.turnover = turnover
+        self.rebalances = rebalances
+
+    def total_return(self):
+        return self.equity[-1] - 1.0
+
+    def max_drawdown(self):
+        peak = np.maximum.accumulate(self.equity, axis=0)
+        return (self.equity / peak - 1.0).min(axis=0)
+
+    def summary(self):
+        return pd.DataFrame({
+            "total_return": self.total_return(),
+            "max_drawdown": self.max_drawdown(),
+            "turnover": self.turnover,
+            "rebalances": self.rebalances,
+        }, index=self.names)
+
+
+def _base(prices, first, starts):
+    """Price each segment's returns are measured from: the close at the
+    segment start, or the first close of a ticker listed later (the replay
+    earns nothing on it until then)."""
+    base = prices[starts]
+    return np.where(np.isnan(base), first, base)
+
+
+def simulate(prices, portfolios, dates=None):
+    """Drift-only accounting for many fixed-mix portfolios.
+
+    ``prices`` is a bars x tickers DataFrame of closes (forward-filled;
+    ``dates`` default to its index). ``portfolios`` maps a name to a spec
+    dict or to ``(weights, frequency, period)``."""
+    prices = prices.ffill()
+    tickers = list(prices.columns)
+    column = {t: i for i, t in enumerate(tickers)}
+    dates = prices.index if dates is None else dates
+    closes = prices.to_numpy(dtype=float)
+    first = prices.bfill().to_numpy(dtype=float)[0] if len(closes) else None
+    n = len(closes)
+
+    names = list(portfolios)
+    equity = np.empty((n, len(names)))
+    turnover = np.zeros(len(names))
+    rebalances = np.zeros(len(names), dtype=int)
+
+    groups = {}
+    for p, name in enumerate(names):
+        spec = portfolios[name]
+        weights, frequency, period = parse(spec) if isinstance(spec, dict) \
+            else spec
+        groups.setdefault((frequency, period), []).append((p, weights))
+
+    for (frequency, period), members in groups.items():
+        mask = rebalance_mask(dates, frequency, period)
+        seg = np.cumsum(mask) - 1
+        starts = np.flatnonzero(mask)
+        base = _base(closes, first, starts)
+        rel = closes / base[seg]
+        rel = np.where(np.isnan(rel), 1.0, rel)
+
+        cols = [p for p, _ in members]
+        w = np.zeros((len(tickers), len(members)))
+        for k, (_, weights) in enumerate(members):
+            for ticker, weight in weights.items():
+                w[column[ticker], k] = weight
+        cash = 1.0 - w.sum(axis=0)
+
+        growth = rel @ w + cash                     # bars x group
+        # value of each segment's holdings at the next rebalance bar
+        into = closes[starts[1:]] / base[:-1]
+        into = np.where(np.isnan(into), 1.0, into)
+        carried = into @ w + cash                   # segments-1 x group
+        level = np.vstack([np.ones((1, len(members))),
+                           np.cumprod(carried, axis=0)])
+        equity[:, cols] = level[seg] * growth
+
+        # turnover: full build on the first bar, then |target - drifted|
+        # (|w - into * w / carried| = |w| * |1 - into / carried|)
+        total = np.abs(w).sum(axis=0)
+        for s in range(len(into)):
+            total += (np.abs(w) * np.abs(1.0 - into[s][:, None]
+                                         / carried[s])).sum(axis=0)
+        turnover[cols] = total
+        rebalances[cols] = len(starts)
+
+    return FixedMixResult(names, dates, equity, turnover, rebalances)
+
+
+def close_matrix(bars, tickers=None):
+    """bars x tickers close DataFrame (NaN where absent) from a
+    ``data["ohlcv"]`` list, indexed by bar date."""
+    panel = OHLCVPanel.from_ohlcv(bars, tickers=tickers)
+    closes = np.where(panel.mask, panel.field("close"), np.nan)
+    return pd.DataFrame(closes.T, columns=panel.tickers,
+                        index=pd.to_datetime(panel.dates))
+
+
+# ---------------------------------------------------------------------- #
+# Strategy adapter                                                       #
+# ---------------------------------------------------------------------- #
+
+class FixedMixStrategy:
+    """``TradingStrategy``-shaped fixed mix: target weights on rebalance
+    bars, ``None`` (hold and drift) on every other bar."""
+
+    def __init__(self, spec):
+        self.weights, self.frequency, self.period = parse(spec)
+        self._dates = []
+        self._mask = np.zeros(0, dtype=bool)
+
+    @property
+    def assets(self):
+        return list(self.weights)
+
+    @property
+    def interval(self):
+        return "1day"
+
+    @property
+    def data(self):
+        return []
+
+    def prepare(self, bars):
+        self._dates = [_bar_date(bar) for bar in bars]
+        self._mask = rebalance_mask(pd.to_datetime(self._dates),
+                                    self.frequency, self.period)
+
+    def run(self, data):
+        ohlcv = data["ohlcv"]
+        k = len(ohlcv) - 1
+        if k < 0:
+            return None
+        if k >= len(self._dates) or self._dates[k] != _bar_date(ohlcv[-1]):
+            self.prepare(ohlcv)
+        if not self._mask[k]:
+            return None
+        return _target_allocation(dict(self.weights))
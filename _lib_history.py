@@ -0,0 +1,431 @@
+"""Bounded ``data["ohlcv"]`` history for strategies with a known lookback.
+
+A strategy that never looks further back than N bars can say so::
+
+    @property
+    def max_lookback(self):
+        return 205
+
+and the runner then hands ``run()`` a ``BoundedHistory`` of the last N bars
+instead of the ever-growing list. The contract is that ``run()`` returns the
+same thing whether it sees the whole history or only its last N bars, which
+includes every ``len(ohlcv) < warmup`` gate (N must cover the warm-up) and
+every index such as ``ohlcv[-126]``. Bars on which a ticker is absent still
+count towards N. Rolling pandas indicators (``SMA``, ``VWAP`` ...) computed
+over a shorter series can differ from the full-history value in the last
+bits, because pandas' online rolling sums carry the whole series.
+
+``BoundedHistory`` is a ring buffer that stores every bar twice (at ``i``
+and ``i + N``), so the live window is always one contiguous run of the
+backing list: appends are O(1), ``h[i]`` is one index computation and
+iteration walks the window in place without copying it. It behaves like a
+read-only list: ``len``, indexing, negative indices, slices (which return
+lists), iteration and ``reversed``.
+
+``ColumnarHistory`` is the compact counterpart for long (hourly) replays: a
+fixed-capacity ring of per-field ticker x bar NumPy columns (float64 or
+float32) with int64 epoch-second timestamps and a presence mask. Bars are
+read through ``__slots__`` views that behave like read-only
+``{ticker: {"open", ..., "date"}}`` dicts, so existing strategies run on it
+unchanged, and ``column()`` hands whole series to vectorized code
+(``_lib_indicators`` uses it when it is there). Dates are parsed once, on
+the way in: ``timestamps()`` returns them as epoch seconds and
+``locate(date)`` finds the last bar on or before a date by binary search.
+"""
+import calendar
+import functools
+import time
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+class BoundedHistory(Sequence):
+    """The last ``capacity`` items of an append-only stream."""
+
+    __slots__ = ("capacity", "_buf", "_n")
+
+    def __init__(self, capacity, items=()):
+        capacity = int(capacity)
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._buf = [None] * (2 * capacity)
+        self._n = 0
+        self.extend(items)
+
+    def append(self, item):
+        i = self._n % self.capacity
+        self._buf[i] = self._buf[i + self.capacity] = item
+        self._n += 1
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    @property
+    def total(self):
+        """Number of items appended so far (including evicted ones)."""
+        return self._n
+
+    def _start(self):
+        return self._n % self.capacity if self._n > self.capacity else 0
+
+    def __len__(self):
+        return min(self._n, self.capacity)
+
+    def __getitem__(self, index):
+        n = len(self)
+        start = self._start()
+        if isinstance(index, slice):
+            return [self._buf[start + j] for j in range(n)[index]]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("history index out of range")
+        return self._buf[start + index]
+
+    def __iter__(self):
+        start = self._start()
+        return map(self._buf.__getitem__, range(start, start + len(self)))
+
+    def __reversed__(self):
+        start = self._start()
+        return map(self._buf.__getitem__,
+                   range(start + len(self) - 1, start - 1, -1))
+
+    def __repr__(self):
+        return f"BoundedHistory({len(self)}/{self.capacity} of {self._n})"
+
+
+# ---------------------------------------------------------------------- #
+# Array-backed storage                                                   #
+# ---------------------------------------------------------------------- #
+
+FIELDS = ("open", "high", "low", "close", "volume")
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+_FIELD = {f: i for i, f in enumerate(FIELDS)}
+
+
+def _epoch(date):
+    stamp = datetime.fromisoformat(str(date))
+    return calendar.timegm(stamp.timetuple())
+
+
+def _as_epoch(date):
+    if isinstance(date, (int, np.integer)):
+        return int(date)
+    if isinstance(date, datetime):
+        return calendar.timegm(date.timetuple())
+    return _epoch(date)
+
+
+@functools.lru_cache(maxsize=4096)
+def _format(epoch):
+    return time.strftime(DATE_FORMAT, time.gmtime(epoch))
+
+
+class TickerBar(Mapping):
+    """Read-only ``{"open", "high", "low", "close", "volume", "date"}``
+    view of one ticker in one stored bar."""
+
+    __slots__ = ("_store", "_row", "_slot")
+
+    def __init__(self, store, row, slot):
+        self._store = store
+        self._row = row
+        self._slot = slot
+
+    def __getitem__(self, field):
+        if field == "date":
+            return _format(self._store._time.item(self._slot))
+        return float(self._store._values.item(
+            (_FIELD[field], self._row, self._slot)))
+
+    def __iter__(self):
+        return iter(FIELDS + ("date",))
+
+    def __len__(self):
+        return len(FIELDS) + 1
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class BarView(Mapping):
+    """Read-only ``{ticker: TickerBar}`` view of one stored bar; tickers
+    absent from the bar are absent from the view."""
+
+    __slots__ = ("_store", "_slot")
+
+    def __init__(self, store, slot):
+        self._store = store
+        self._slot = slot
+
+    def __getitem__(self, ticker):
+        row = self._store._row.get(ticker)
+        if row is None or not self._store._mask.item((row, self._slot)):
+            raise KeyError(ticker)
+        return TickerBar(self._store, row, self._slot)
+
+    def __contains__(self, ticker):
+        row = self._store._row.get(ticker)
+        return row is not None and self._store._mask.item((row, self._slot))
+
+    def __iter__(self):
+        mask = self._store._mask[:, self._slot]
+        return (t for t, present in zip(self._store.tickers, mask.tolist())
+                if present)
+
+    def __len__(self):
+        return int(self._store._mask[:, self._slot].sum())
+
+    def __repr__(self):
+        return repr({t: dict(v) for t, v in self.items()})
+
+
+class ColumnarHistory(Sequence):
+    """Fixed-capacity bar history stored as ticker x bar NumPy columns.
+
+    Each bar costs ``5 x itemsize`` bytes per ticker plus one presence flag,
+    and one int64 epoch-second timestamp for the bar (the first ticker's
+    date, as ``_lib_panel._bar_date`` reads it), against several hundred
+    bytes per value for the dict-of-dict bars. Once full, the oldest bar is
+    overwritten. Indexing returns ``BarView`` objects that read the arrays
+    lazily, so code written against ``data["ohlcv"]`` keeps working; a view
+    is only valid until its slot is overwritten. ``column()`` gives whole
+    series without going through the views."""
+
+    def __init__(self, capacity, tickers=(), dtype=np.float64):
+        capacity = int(capacity)
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self.tickers = []
+        self._row = {}
+        self._values = np.full((len(FIELDS), 0, capacity), np.nan,
+                               dtype=self.dtype)
+        self._mask = np.zeros((0, capacity), dtype=bool)
+        self._time = np.zeros(capacity, dtype=np.int64)
+        self._n = 0
+        for ticker in tickers:
+            self._add_ticker(ticker)
+
+    @classmethod
+    def from_frame(cls, frame, dtype=np.float64, capacity=None):
+        """Build from a long ``date, ticker, open, ..., volume`` frame (as
+        returned by ``_lib_replay.load_frame``) without per-bar dicts."""
+        dates = pd.DatetimeIndex(sorted(frame["date"].unique()))
+        tickers = sorted(frame["ticker"].unique())
+        store = cls(capacity or max(len(dates), 1), tickers, dtype)
+        n = min(len(dates), store.capacity)
+        skip = len(dates) - n
+        d_idx = dates.get_indexer(frame["date"]) - skip
+        keep = d_idx >= 0
+        t_idx = pd.Index(tickers).get_indexer(frame["ticker"])[keep]
+        d_idx = d_idx[keep]
+        for f, field in enumerate(FIELDS):
+            store._values[f, t_idx, d_idx] = \
+                frame[field].to_numpy(dtype=float)[keep]
+        store._mask[t_idx, d_idx] = True
+        store._time[:n] = dates[skip:].asi8 // 1_000_000_000
+        store._n = n
+        return store
+
+    def _add_ticker(self, ticker):
+        self._row[ticker] = len(self.tickers)
+        self.tickers.append(ticker)
+        pad = np.full((len(FIELDS), 1, self.capacity), np.nan,
+                      dtype=self.dtype)
+        self._values = np.concatenate([self._values, pad], axis=1)
+        self._mask = np.vstack([self._mask,
+                                np.zeros((1, self.capacity), dtype=bool)])
+        return self._row[ticker]
+
+    def append(self, bar):
+        """Store one ``{ticker: {field: value, "date": ...}}`` bar."""
+        slot = self._n % self.capacity
+        self._mask[:, slot] = False
+        self._values[:, :, slot] = np.nan
+        date = None
+        for ticker, rec in bar.items():
+            if not rec:
+                continue
+            row = self._row.get(ticker)
+            if row is None:
+                row = self._add_ticker(ticker)
+            for f, field in enumerate(FIELDS):
+                value = rec.get(field)
+                if value is not None:
+                    self._values[f, row, slot] = value
+            self._mask[row, slot] = True
+            if date is None and rec.get("date"):
+                date = rec["date"]
+        self._time[slot] = _epoch(date) if date is not None else 0
+        self._n += 1
+
+    def extend(self, bars):
+        for bar in bars:
+            self.append(bar)
+
+    @property
+    def total(self):
+        return self._n
+
+    @property
+    def nbytes(self):
+        return self._values.nbytes + self._mask.nbytes + self._time.nbytes
+
+    def _start(self):
+        return self._n % self.capacity if self._n > self.capacity else 0
+
+    def __len__(self):
+        return min(self._n, self.capacity)
+
+    def _slot(self, index):
+        return (self._start() + index) % self.capacity
+
+    def __getitem__(self, index):
+        n = len(self)
+        if isinstance(index, slice):
+            return [BarView(self, self._slot(j)) for j in range(n)[index]]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("history index out of range")
+        return BarView(self, self._slot(index))
+
+    def __iter__(self):
+        return self._views(0, len(self))
+
+    def __reversed__(self):
+        return (BarView(self, self._slot(j))
+                for j in range(len(self) - 1, -1, -1))
+
+    def _range(self, array, start, stop):
+        """Bars ``start:stop`` of ``array`` (last axis) in time order."""
+        if stop <= start:
+            return array[..., :0]
+        first = self._slot(start)
+        last = first + stop - start
+        if last <= self.capacity:
+            return array[..., first:last]
+        return np.concatenate([array[..., first:],
+                               array[..., :last - self.capacity]], axis=-1)
+
+    def _ordered(self, array, n):
+        size = len(self)
+        n = size if n is None else min(int(n), size)
+        return self._range(array, size - n, size)
+
+    def column(self, ticker, field="close", n=None):
+        """Last ``n`` values of one ticker's field in time order, NaN where
+        the ticker was absent (a view unless the window wraps)."""
+        return self._ordered(self._values[_FIELD[field], self._row[ticker]],
+                             n)
+
+    def present(self, ticker, n=None):
+        return self._ordered(self._mask[self._row[ticker]], n)
+
+    def timestamps(self, n=None):
+        """Epoch seconds of the last ``n`` bars."""
+        return self._ordered(self._time, n)
+
+    def _locate(self, epoch, start, stop):
+        """Index (relative to ``start``) of the last of bars ``start:stop``
+        stamped at or before ``epoch``, or -1. The live bars occupy at most
+        two sorted runs of the ring, each searched in O(log n)."""
+        first = self._slot(start)
+        last = first + stop - start
+        runs = [(first, min(last, self.capacity))]
+        if last > self.capacity:
+            runs.append((0, last - self.capacity))
+        offset, found = 0, -1
+        for lo, hi in runs:
+            k = int(np.searchsorted(self._time[lo:hi], epoch, side="right"))
+            if k:
+                found = offset + k - 1
+            if k < hi - lo:
+                break
+            offset += hi - lo
+        return found
+
+    def locate(self, date):
+        """Index of the last bar dated on or before ``date`` (a date string,
+        ``datetime`` or epoch seconds), or -1 if every bar is later."""
+        return self._locate(_as_epoch(date), 0, len(self))
+
+    def _views(self, start, stop):
+        first = self._start()
+        return (BarView(self, (first + j) % self.capacity)
+                for j in range(start, stop))
+
+    def window(self, start=0, stop=None, limit=None):
+        return HistoryWindow(self, start, len(self) if stop is None else stop,
+                             limit)
+
+    def __repr__(self):
+        return (f"ColumnarHistory({len(self)}/{self.capacity} bars, "
+                f"{len(self.tickers)} tickers, {self.dtype})")
+
+
+class HistoryWindow(Sequence):
+    """Bars ``start:stop`` of a ``ColumnarHistory`` that is already filled,
+    for replaying a stored history without copying it. ``append`` moves
+    the end forward by one bar (the bar itself is already stored) and, with
+    ``limit``, drags the start along so at most ``limit`` bars are
+    visible."""
+
+    __slots__ = ("_store", "_start", "_stop", "_limit")
+
+    def __init__(self, store, start, stop, limit=None):
+        self._store = store
+        self._limit = limit
+        self._stop = stop
+        self._start = start if not limit else max(start, stop - limit)
+
+    def append(self, bar=None):
+        self._stop += 1
+        if self._limit and self._stop - self._start > self._limit:
+            self._start += 1
+
+    @property
+    def total(self):
+        """Number of bars the window has moved past (its end)."""
+        return self._stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        n = len(self)
+        if isinstance(index, slice):
+            return [self._store[self._start + j] for j in range(n)[index]]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("history index out of range")
+        return self._store[self._start + index]
+
+    def __iter__(self):
+        return self._store._views(self._start, self._stop)
+
+    def column(self, ticker, field="close"):
+        store = self._store
+        return store._range(store._values[_FIELD[field], store._row[ticker]],
+                            self._start, self._stop)
+
+    def present(self, ticker):
+        store = self._store
+        return store._range(store._mask[store._row[ticker]], self._start,
+                            self._stop)
+
+    def timestamps(self):
+        store = self._store
+        return store._range(store._time, self._start, self._stop)
+
+    def locate(self, date):
+        return self._store._locate(_as_epoch(date), self._start, self._stop)
@@ -0,0 +1,718 @@
+"""Batch and streaming technical indicators for local replays.
+
+``surmount.technical_indicators`` wraps pandas_ta: every call such as
+``SMA(ticker, ohlcv, length=200)`` pulls the ticker's series out of the whole
+history and recomputes the indicator from the first bar, so calling it once
+per bar makes an N-bar replay O(N^2).
+
+This module provides two things:
+
+* Batch reference functions (``SMA``, ``EMA``, ``RSI``, ``ATR``, ``VWAP``,
+  ``STDEV``, ``BB``) with the Surmount call signature, implemented with the
+  same pandas operations pandas_ta uses (SMA-seeded EMA, Wilder/RMA smoothing
+  for RSI and ATR, rolling variance for STDEV/BB). VWAP has no pandas_ta
+  counterpart with a ``length`` argument; it is the rolling
+  sum(typical price x volume) / sum(volume) over ``length`` bars.
+  ``MACD``, ``Momentum``, ``Slope`` and ``MFI`` are provided in batch form
+  only, so the local Surmount stand-in can serve the strategies that use
+  them.
+
+* ``IndicatorEngine``, which keeps running sums, EMA state and Wilder
+  smoothing per (ticker, indicator, params) and is fed one bar at a time.
+  The streaming recurrences reproduce pandas' own ewm and rolling-window
+  algorithms operation for operation (including Kahan compensation), so the
+  value returned after each bar equals the last element of the batch
+  function evaluated over the same history — not merely to a tolerance.
+
+    engine = IndicatorEngine()
+    ...
+    engine.sync(data["ohlcv"])                  # O(new bars)
+    sma200 = engine.SMA("SPY", 200)             # == SMA("SPY", ohlcv, 200)[-1]
+    atr14 = engine.ATR("QQQ", 14)
+
+The local ``surmount.technical_indicators`` stand-in serves the batch
+functions through ``cache`` (an ``IndicatorCache``), so repeating a call on
+the same bar of a ``_lib_history`` history costs a dictionary lookup.
+"""
+import functools
+import math
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from _lib_panel import OHLCVPanel
+
+
+NaN = float("nan")
+_HLCV = ("high", "low", "close", "volume")
+
+
+# ---------------------------------------------------------------------- #
+# Batch reference implementations (Surmount signature)                   #
+# ---------------------------------------------------------------------- #
+
+def _column(ticker, data, field):
+    if hasattr(data, "column") and data.present(ticker).all():
+        # ``_lib_history`` columnar storage: no per-bar views
+        return pd.Series(data.column(ticker, field), dtype="float64")
+    return pd.Series([bar[ticker][field] for bar in data], dtype="float64")
+
+
+def _rma(series, length):
+    return series.ewm(alpha=1.0 / length, min_periods=length).mean()
+
+
+def _ema(series, length):
+    series = series.copy()
+    seed = series[0:length].mean()
+    series[:length - 1] = NaN
+    series.iloc[length - 1] = seed
+    return series.ewm(span=length, adjust=False).mean()
+
+
+def _true_range(high, low, close):
+    high_low = high - low
+    if high_low.eq(0).any():
+        high_low += sys.float_info.epsilon
+    prev_close = close.shift(1)
+    tr = pd.concat([high_low, high - prev_close, prev_close - low], axis=1)
+    tr = tr.abs().max(axis=1)
+    tr.iloc[:1] = NaN
+    return tr
+
+
+def _sma(close, length):
+    return close.rolling(length, min_periods=length).mean()
+
+
+def _rsi(close, length):
+    negative = close.diff(1)
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    pos_avg = _rma(positive, length)
+    neg_avg = _rma(negative, length)
+    return 100.0 * pos_avg / (pos_avg + neg_avg.abs())
+
+
+def _vwap(high, low, close, volume, length):
+    pv = (high + low + close) / 3 * volume
+    return (pv.rolling(length, min_periods=length).sum()
+            / volume.rolling(length, min_periods=length).sum())
+
+
+def _stdev(close, length):
+    return close.rolling(length, min_periods=length).var(1).apply(np.sqrt)
+
+
+def _bb(close, length, std):
+    dev = std * close.rolling(length, min_periods=length).var(0) \
+        .apply(np.sqrt)
+    mid = _sma(close, length)
+    return {"upper": mid + dev, "mid": mid, "lower": mid - dev}
+
+
+def _momentum(close, length):
+    return close.diff(length)
+
+
+def _slope(close, length):
+    return close.diff(length) / length
+
+
+def _mfi(high, low, close, volume, length):
+    typical = (high + low + close) / 3
+    raw_flow = typical * volume
+    change = typical.diff(1)
+    pos = raw_flow.where(change > 0, 0.0)
+    neg = raw_flow.where(change < 0, 0.0)
+    psum = pos.rolling(length).sum()
+    nsum = neg.rolling(length).sum()
+    return 100.0 * psum / (psum + nsum)
+
+
+def SMA(ticker, data, length):
+    if len(data) < length:
+        return None
+    return _sma(_column(ticker, data, "close"), length).tolist()
+
+
+def EMA(ticker, data, length):
+    if len(data) < length:
+        return None
+    return _ema(_column(ticker, data, "close"), length).tolist()
+
+
+def RSI(ticker, data, length):
+    if len(data) < length:
+        return None
+    return _rsi(_column(ticker, data, "close"), length).tolist()
+
+
+def ATR(ticker, data, length):
+    if len(data) < length:
+        return None
+    tr = _true_range(_column(ticker, data, "high"),
+                     _column(ticker, data, "low"),
+                     _column(ticker, data, "close"))
+    return _rma(tr, length).tolist()
+
+
+def VWAP(ticker, data, length):
+    if len(data) < length:
+        return None
+    return _vwap(*(_column(ticker, data, f) for f in _HLCV),
+                 length).tolist()
+
+
+def STDEV(ticker, data, length):
+    if len(data) < length:
+        return None
+    return _stdev(_column(ticker, data, "close"), length).tolist()
+
+
+def BB(ticker, data, length, std):
+    if len(data) < length:
+        return None
+    bands = _bb(_column(ticker, data, "close"), length, std)
+    return {band: series.tolist() for band, series in bands.items()}
+
+
+def MACD(ticker, data, fast, slow, signal=9):
+    if slow < fast:
+        fast, slow = slow, fast
+    if len(data) < max(fast, slow, signal):
+        return None
+    close = _column(ticker, data, "close")
+    macd = _ema(close, fast) - _ema(close, slow)
+    signal_ma = _ema(macd.loc[macd.first_valid_index():], signal)
+    hist = macd - signal_ma
+    props = f"_{fast}_{slow}_{signal}"
+    return {f"MACD{props}": macd.tolist(),
+            f"MACDh{props}": hist.tolist(),
+            f"MACDs{props}": signal_ma.reindex(macd.index).tolist()}
+
+
+def Momentum(ticker, data, length):
+    if len(data) < length:
+        return None
+    return _momentum(_column(ticker, data, "close"), length).tolist()
+
+
+def Slope(ticker, data, length):
+    if len(data) < length:
+        return None
+    return _slope(_column(ticker, data, "close"), length).tolist()
+
+
+def MFI(ticker, data, length):
+    if len(data) < length:
+        return None
+    return _mfi(*(_column(ticker, data, f) for f in _HLCV),
+                length).tolist()
+
+
+# ---------------------------------------------------------------------- #
+# Per-bar memoization                                                    #
+# ---------------------------------------------------------------------- #
+
+def _copy(value):
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return {k: list(v) for k, v in value.items()}
+    return value
+
+
+class IndicatorCache:
+    """Memo of batch indicator results for the bar being evaluated.
+
+    A call is keyed on (indicator, ticker, params) plus the history object
+    it was given and how many bars have been appended to it (``total``).
+    ``_lib_history``'s histories are append-only, so that pair identifies
+    every field of every bar in O(1), and repeated calls within one
+    ``run()`` hit the cache. Plain lists can be edited in place and carry
+    no such counter, so calls on them are not cached. The memo only holds
+    the current bar (the first call whose history ends on a different date
+    drops everything) and keeps the histories it was given alive until
+    then, so object identities cannot be reused. Hits return a copy, since
+    strategies own the lists they are given."""
+
+    def __init__(self):
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._date = None
+        self._values = {}
+
+    def clear(self):
+        self._date = None
+        self._values.clear()
+
+    def wrap(self, fn):
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        def cached(ticker, data, *args, **kwargs):
+            total = getattr(data, "total", None)
+            if not self.enabled or total is None or not len(data):
+                return fn(ticker, data, *args, **kwargs)
+            last = data[-1]
+            first_rec = next(iter(last.values()), None) if last else None
+            date = first_rec.get("date") if first_rec else None
+            if date != self._date:
+                self._values.clear()
+                self._date = date
+            # histories hash by identity; the key keeps ``data`` alive
+            key = (name, ticker, args, tuple(sorted(kwargs.items())),
+                   data, total)
+            try:
+                value = self._values[key]
+                self.hits += 1
+            except KeyError:
+                value = self._values[key] = fn(ticker, data, *args, **kwargs)
+                self.misses += 1
+            except TypeError:
+                # unhashable parameters
+                return fn(ticker, data, *args, **kwargs)
+            return _copy(value)
+        return cached
+
+
+cache = IndicatorCache()
+
+
+# ---------------------------------------------------------------------- #
+# pandas recurrences, one observation at a time                          #
+# ---------------------------------------------------------------------- #
+
+class _EWM:
+    """``Series.ewm(...).mean()`` (ignore_na=False) as a recurrence, with
+    pandas' operation order so results are bit-identical."""
+
+    __slots__ = ("factor", "new_wt", "adjust", "minp",
+                 "weighted", "old_wt", "nobs", "started")
+
+    def __init__(self, span=None, alpha=None, adjust=True, min_periods=0):
+        if span is not None:
+            com = (span - 1) / 2.0
+        else:
+            com = (1 - alpha) / alpha
+        alpha = 1.0 / (1.0 + com)
+        self.factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.minp = max(int(min_periods), 1)
+        self.weighted = NaN
+        self.old_wt = 1.0
+        self.nobs = 0
+        self.started = False
+
+    def update(self, cur):
+        is_obs = cur == cur
+        if not self.started:
+            self.started = True
+            self.weighted = cur
+            self.nobs = int(is_obs)
+        else:
+            self.nobs += is_obs
+            weighted = self.weighted
+            if weighted == weighted:
+                self.old_wt *= self.factor
+                if is_obs:
+                    if weighted != cur:
+                        weighted = self.old_wt * weighted + self.new_wt * cur
+                        weighted /= (self.old_wt + self.new_wt)
+                        self.weighted = weighted
+                    if self.adjust:
+                        self.old_wt += self.new_wt
+                    else:
+                        self.old_wt = 1.0
+            elif is_obs:
+                self.weighted = cur
+        return self.weighted if self.nobs >= self.minp else NaN
+
+    def peek(self, cur):
+        """Value ``update(cur)`` would return, without committing it."""
+        saved = (self.weighted, self.old_wt, self.nobs, self.started)
+        out = self.update(cur)
+        self.weighted, self.old_wt, self.nobs, self.started = saved
+        return out
+
+
+class _RollingSum:
+    """``Series.rolling(window).sum()`` / ``.mean()`` with pandas' Kahan
+    add/remove bookkeeping."""
+
+    __slots__ = ("window", "minp", "buf", "nobs", "sum_x", "comp_add",
+                 "comp_remove", "neg_ct", "same", "prev")
+
+    def __init__(self, window, min_periods=None):
+        self.window = window
+        self.minp = window if min_periods is None else min_periods
+        self.buf = deque()
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.neg_ct = 0
+        self.same = 0
+        self.prev = None
+
+    def _add(self, val):
+        if self.prev is None:
+            self.prev = val
+        if val == val:
+            self.nobs += 1
+            y = val - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct += 1
+            if val == self.prev:
+                self.same += 1
+            else:
+                self.same = 1
+            self.prev = val
+
+    def _remove(self, val):
+        if val == val:
+            self.nobs -= 1
+            y = -val - self.comp_remove
+            t = self.sum_x + y
+            self.comp_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct -= 1
+
+    def push(self, val):
+        if len(self.buf) == self.window:
+            self._remove(self.buf.popleft())
+        self.buf.append(val)
+        self._add(val)
+
+    def sum(self):
+        if self.nobs == 0 == self.minp:
+            return 0.0
+        if self.nobs >= self.minp:
+            if self.same >= self.nobs:
+                return self.prev * self.nobs
+            return self.sum_x
+        return NaN
+
+    def mean(self):
+        if self.nobs >= self.minp and self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.same >= self.nobs:
+                return self.prev
+            if self.neg_ct == 0 and result < 0:
+                return 0.0
+            if self.neg_ct == self.nobs and result > 0:
+                return 0.0
+            return result
+        return NaN
+
+
+class _RollingVar:
+    """``Series.rolling(window).var(ddof)`` with pandas' Welford/Kahan
+    add/remove bookkeeping."""
+
+    __slots__ = ("window", "minp", "ddof", "buf", "nobs", "mean_x",
+                 "ssqdm_x", "comp_add", "comp_remove", "same", "prev")
+
+    def __init__(self, window, ddof=1, min_periods=None):
+        self.window = window
+        self.minp = max(window if min_periods is None else min_periods, 1)
+        self.ddof = ddof
+        self.buf = deque()
+        self.nobs = 0.0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same = 0
+        self.prev = None
+
+    def _add(self, val):
+        if self.prev is None:
+            self.prev = val
+        if val != val:
+            return
+        self.nobs += 1
+        if val == self.prev:
+            self.same += 1
+        else:
+            self.same = 1
+        self.prev = val
+        prev_mean = self.mean_x - self.comp_add
+        y = val - self.comp_add
+        t = y - self.mean_x
+        self.comp_add = t + self.mean_x - y
+        if self.nobs:
+            self.mean_x = self.mean_x + t / self.nobs
+        else:
+            self.mean_x = 0.0
+        self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+
+    def _remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.comp_remove
+            y = val - self.comp_remove
+            t = y - self.mean_x
+            self.comp_remove = t + self.mean_x - y
+            self.mean_x = self.mean_x - t / self.nobs
+            self.ssqdm_x = self.ssqdm_x - (val - prev_mean) * (val - self.mean_x)
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+
+    def push(self, val):
+        if len(self.buf) == self.window:
+            self._remove(self.buf.popleft())
+        self.buf.append(val)
+        self._add(val)
+
+    def var(self):
+        if self.nobs >= self.minp and self.nobs > self.ddof:
+            if self.nobs == 1 or self.same >= self.nobs:
+                return 0.0
+            return self.ssqdm_x / (self.nobs - self.ddof)
+        return NaN
+
+
+# ---------------------------------------------------------------------- #
+# Streaming indicators                                                   #
+# ---------------------------------------------------------------------- #
+
+class StreamingSMA:
+    def __init__(self, length):
+        self.length = length
+        self._mean = _RollingSum(length)
+
+    def update(self, o, h, l, c, v):
+        self._mean.push(c)
+        return self._mean.mean()
+
+
+class StreamingEMA:
+    """pandas_ta EMA: the first ``length`` closes are replaced by their SMA,
+    then a recursive (adjust=False) EMA runs from there."""
+
+    def __init__(self, length):
+        self.length = length
+        self._seed = []
+        self._ewm = _EWM(span=length, adjust=False)
+
+    def update(self, o, h, l, c, v):
+        if self._seed is not None:
+            self._seed.append(c)
+            if len(self._seed) < self.length:
+                return self._ewm.update(NaN)
+            seed = float(np.mean(np.asarray(self._seed, dtype=np.float64)))
+            self._seed = None
+            return self._ewm.update(seed)
+        return self._ewm.update(c)
+
+
+class StreamingRSI:
+    def __init__(self, length):
+        self.length = length
+        self._prev = None
+        self._pos = _EWM(alpha=1.0 / length, min_periods=length)
+        self._neg = _EWM(alpha=1.0 / length, min_periods=length)
+
+    def update(self, o, h, l, c, v):
+        diff = NaN if self._prev is None else c - self._prev
+        self._prev = c
+        pos = 0.0 if diff < 0 else diff
+        neg = 0.0 if diff > 0 else diff
+        pos_avg = self._pos.update(pos)
+        neg_avg = self._neg.update(neg)
+        denom = pos_avg + abs(neg_avg)
+        if denom != denom:
+            return NaN
+        if denom == 0:
+            return NaN if pos_avg == 0 else math.copysign(math.inf, pos_avg)
+        return 100.0 * pos_avg / denom
+
+
+class StreamingATR:
+    """Wilder-smoothed true range. pandas_ta nudges every high-low range by
+    machine epsilon once any bar in the series has a zero range; a second
+    smoothing state tracks that variant so the switch is exact too."""
+
+    def __init__(self, length):
+        self.length = length
+        self._prev_close = None
+        self._zero_seen = False
+        self._rma = _EWM(alpha=1.0 / length, min_periods=length)
+        self._rma_eps = _EWM(alpha=1.0 / length, min_periods=length)
+
+    def _tr(self, h, l, pc, eps):
+        hl = h - l
+        if eps:
+            hl += sys.float_info.epsilon
+        vals = [abs(x) for x in (hl, h - pc, pc - l) if x == x]
+        return max(vals) if vals else NaN
+
+    def update(self, o, h, l, c, v):
+        if h - l == 0:
+            self._zero_seen = True
+        if self._prev_close is None:
+            tr = tr_eps = NaN
+        else:
+            tr = self._tr(h, l, self._prev_close, False)
+            tr_eps = self._tr(h, l, self._prev_close, True)
+        self._prev_close = c
+        plain = self._rma.update(tr)
+        nudged = self._rma_eps.update(tr_eps)
+        return nudged if self._zero_seen else plain
+
+
+class StreamingVWAP:
+    def __init__(self, length):
+        self.length = length
+        self._pv = _RollingSum(length)
+        self._vol = _RollingSum(length)
+
+    def update(self, o, h, l, c, v):
+        self._pv.push((h + l + c) / 3 * v)
+        self._vol.push(v)
+        num, den = self._pv.sum(), self._vol.sum()
+        if den != den or num != num:
+            return NaN
+        if den == 0:
+            return NaN if num == 0 else math.copysign(math.inf, num)
+        return num / den
+
+
+class StreamingSTDEV:
+    def __init__(self, length, ddof=1):
+        self.length = length
+        self._var = _RollingVar(length, ddof=ddof)
+
+    def update(self, o, h, l, c, v):
+        self._var.push(c)
+        var = self._var.var()
+        return math.sqrt(var) if var >= 0 else NaN
+
+
+class StreamingBB:
+    """Bollinger bands as (upper, mid, lower)."""
+
+    def __init__(self, length, std):
+        self.length = length
+        self.std = std
+        self._mean = _RollingSum(length)
+        self._var = _RollingVar(length, ddof=0)
+
+    def update(self, o, h, l, c, v):
+        self._mean.push(c)
+        self._var.push(c)
+        var = self._var.var()
+        dev = self.std * (math.sqrt(var) if var >= 0 else NaN)
+        mid = self._mean.mean()
+        return (mid + dev, mid, mid - dev)
+
+
+STREAMING = {
+    "SMA": StreamingSMA,
+    "EMA": StreamingEMA,
+    "RSI": StreamingRSI,
+    "ATR": StreamingATR,
+    "VWAP": StreamingVWAP,
+    "STDEV": StreamingSTDEV,
+    "BB": StreamingBB,
+}
+
+
+class IndicatorEngine:
+    """Per-(ticker, indicator, params) streaming state fed one bar at a time.
+
+    Bars are held in an ``OHLCVPanel`` so an indicator requested for the
+    first time part-way through a replay is caught up once over the stored
+    history; after that every bar costs O(1) per registered indicator. Query
+    methods return the value the batch function's last element would have,
+    or None while fewer than ``length`` bars exist (the batch functions
+    return None in that case)."""
+
+    def __init__(self, tickers=()):
+        self.panel = OHLCVPanel(tickers)
+        # (ticker, name, params) -> [stream, bars fed, last value, panel pos]
+        self._streams = {}
+
+    def _feed(self, entry, ticker, start):
+        stream = entry[0]
+        i = self.panel.row(ticker)
+        p = self.panel
+        o, h, l = p.field("open")[i], p.field("high")[i], p.field("low")[i]
+        c, v, m = p.field("close")[i], p.field("volume")[i], p.mask[i]
+        for k in range(start, len(p)):
+            if m[k]:
+                entry[2] = stream.update(float(o[k]), float(h[k]), float(l[k]),
+                                         float(c[k]), float(v[k]))
+                entry[1] += 1
+        entry[3] = len(p)
+
+    def update(self, bar):
+        """Append one ``{ticker: {...}}`` bar and advance every stream."""
+        self.panel.append(bar)
+        self._advance()
+
+    def sync(self, ohlcv):
+        """Feed the bars of ``ohlcv`` that have not been seen yet."""
+        before = len(self.panel)
+        added = self.panel.sync(ohlcv)
+        if before and len(self.panel) == added:
+            for key in list(self._streams):
+                self._streams[key] = self._new_entry(key)
+        self._advance()
+        return added
+
+    def _new_entry(self, key):
+        ticker, name, params = key
+        return [STREAMING[name](*params), 0, None, 0]
+
+    def _advance(self):
+        for (ticker, _, _), entry in self._streams.items():
+            if ticker in self.panel and entry[3] < len(self.panel):
+                self._feed(entry, ticker, entry[3])
+
+    def value(self, name, ticker, *params):
+        key = (ticker, name, params)
+        entry = self._streams.get(key)
+        if entry is None:
+            entry = self._streams[key] = self._new_entry(key)
+            if ticker in self.panel:
+                self._feed(entry, ticker, 0)
+        if entry[1] < params[0]:
+            return None
+        return entry[2]
+
+    def SMA(self, ticker, length):
+        return self.value("SMA", ticker, length)
+
+    def EMA(self, ticker, length):
+        return self.value("EMA", ticker, length)
+
+    def RSI(self, ticker, length):
+        return self.value("RSI", ticker, length)
+
+    def ATR(self, ticker, length):
+        return self.value("ATR", ticker, length)
+
+    def VWAP(self, ticker, length):
+        return self.value("VWAP", ticker, length)
+
+    def STDEV(self, ticker, length):
+        return self.value("STDEV", ticker, length)
+
+    def BB(self, ticker, length, std):
+        """(upper, mid, lower) or None."""
+        return self.value("BB", ticker, length, std)
@@ -0,0 +1,210 @@
+"""Columnar OHLCV panel shared by the local replay tooling.
+
+Every strategy in this tree receives ``data["ohlcv"]`` as a list of per-bar
+dicts (``{ticker: {"open", "high", "low", "close", "volume", "date"}}``) and
+most of them rebuild close/high/low series from it on every call with list
+comprehensions such as ``[d[asset]["close"] for d in ohlcv]``. That is
+O(bars x tickers) Python dict lookups per bar, i.e. quadratic over a replay.
+
+``OHLCVPanel`` stores the same information once, as one float64 array per
+field laid out ticker x time, plus a boolean presence mask (a ticker that is
+missing from a bar is NaN in every field and False in the mask). It is built
+once from ``data["ohlcv"]`` and then kept current with ``sync()``, which only
+appends the bars it has not seen yet, so keeping it up to date costs O(new
+bars) per call. Slices returned by the query helpers are views into the
+underlying arrays — copy them before mutating.
+
+Typical use inside a replay:
+
+    panel = OHLCVPanel(tickers)
+    ...
+    panel.sync(data["ohlcv"])              # O(new bars)
+    closes = panel.window("close", 60)     # tickers x 60 aligned view
+    spy = panel.series("SPY", n=200)       # last 200 SPY closes
+"""
+import numpy as np
+
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _bar_date(bar):
+    """Date string of a bar: the date of its first ticker entry, mirroring
+    ``next(iter(ohlcv[-1].values()))["date"]`` used across the strategies."""
+    for v in bar.values():
+        if v and v.get("date"):
+            return v["date"]
+    return None
+
+
+class OHLCVPanel:
+    """NumPy-backed ticker x time panel with amortized O(1) appends."""
+
+    def __init__(self, tickers=(), capacity=256):
+        self.tickers = []
+        self._row = {}
+        self._n = 0
+        self._cap = max(int(capacity), 1)
+        self._data = {f: np.full((0, self._cap), np.nan) for f in FIELDS}
+        self._mask = np.zeros((0, self._cap), dtype=bool)
+        self.dates = []
+        for t in tickers:
+            self._add_ticker(t)
+
+    # ------------------------------------------------------------------ #
+    # Construction / incremental maintenance                             #
+    # ------------------------------------------------------------------ #
+
+    @classmethod
+    def from_ohlcv(cls, ohlcv, tickers=None):
+        """Build a panel from a Surmount-style ``data["ohlcv"]`` list."""
+        panel = cls(tickers or (), capacity=max(len(ohlcv), 1))
+        for bar in ohlcv:
+            panel.append(bar, add_tickers=tickers is None)
+        return panel
+
+    def _add_ticker(self, ticker):
+        if ticker in self._row:
+            return self._row[ticker]
+        self._row[ticker] = len(self.tickers)
+        self.tickers.append(ticker)
+        for f in FIELDS:
+            self._data[f] = np.vstack(
+                [self._data[f], np.full((1, self._cap), np.nan)])
+        self._mask = np.vstack(
+            [self._mask, np.zeros((1, self._cap), dtype=bool)])
+        return self._row[ticker]
+
+    def _grow(self):
+        cap = self._cap * 2
+        for f in FIELDS:
+            arr = np.full((len(self.tickers), cap), np.nan)
+            arr[:, :self._n] = self._data[f][:, :self._n]
+            self._data[f] = arr
+        mask = np.zeros((len(self.tickers), cap), dtype=bool)
+        mask[:, :self._n] = self._mask[:, :self._n]
+        self._mask = mask
+        self._cap = cap
+
+    def append(self, bar, add_tickers=True):
+        """Append one ``{ticker: {field: value}}`` bar. Tickers that are not
+        yet in the panel are added when ``add_tickers`` is true and ignored
+        otherwise."""
+        if self._n == self._cap:
+            self._grow()
+        j = self._n
+        for ticker, values in bar.items():
+            i = self._row.get(ticker)
+            if i is None:
+                if not add_tickers:
+                    continue
+                i = self._add_ticker(ticker)
+            if not values:
+                continue
+            present = False
+            for f in FIELDS:
+                v = values.get(f)
+                if v is not None:
+                    self._data[f][i, j] = v
+                    present = True
+            self._mask[i, j] = present
+        self.dates.append(_bar_date(bar))
+        self._n += 1
+
+    def sync(self, ohlcv):
+        """Bring the panel up to date with ``ohlcv`` and return the number of
+        bars appended.
+
+        The newest bar already held is located by scanning ``ohlcv`` backwards
+        from the end, so the cost is proportional to the number of new bars.
+        If the history no longer contains that bar (a restart, or a different
+        replay) the panel is rebuilt from scratch."""
+        if not ohlcv:
+            return 0
+        start = 0
+        if self._n:
+            last = self.dates[-1]
+            k = len(ohlcv) - 1
+            while k >= 0 and _bar_date(ohlcv[k]) != last:
+                k -= 1
+            if k < 0:
+                self.reset()
+            else:
+                start = k + 1
+        for bar in ohlcv[start:]:
+            self.append(bar)
+        return len(ohlcv) - start
+
+    def reset(self):
+        """Drop all bars, keeping the ticker rows."""
+        self._n = 0
+        for f in FIELDS:
+            self._data[f][:] = np.nan
+        self._mask[:] = False
+        self.dates = []
+
+    # ------------------------------------------------------------------ #
+    # Queries                                                            #
+    # ------------------------------------------------------------------ #
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, ticker):
+        return ticker in self._row
+
+    def row(self, ticker):
+        return self._row[ticker]
+
+    @property
+    def mask(self):
+        """tickers x bars presence mask (view)."""
+        return self._mask[:, :self._n]
+
+    def field(self, name):
+        """tickers x bars array of one field (view)."""
+        return self._data[name][:, :self._n]
+
+    def window(self, name, n=None, tickers=None):
+        """Aligned tickers x n slice of the last ``n`` bars of a field. With
+        ``tickers`` the rows are returned in that order (a copy)."""
+        start = 0 if n is None else max(self._n - int(n), 0)
+        arr = self._data[name][:, start:self._n]
+        if tickers is None:
+            return arr
+        return arr[[self._row[t] for t in tickers]]
+
+    def series(self, ticker, name="close", n=None):
+        """Last ``n`` values of one ticker's field, NaN where the ticker was
+        missing from a bar (view)."""
+        start = 0 if n is None else max(self._n - int(n), 0)
+        return self._data[name][self._row[ticker], start:self._n]
+
+    def valid(self, ticker, name="close", n=None):
+        """Last ``n`` bars of one ticker's field with missing bars dropped —
+        the panel counterpart of the ``get_closes`` / ``_close_series``
+        helpers that skip bars where the ticker is absent."""
+        start = 0 if n is None else max(self._n - int(n), 0)
+        i = self._row[ticker]
+        return self._data[name][i, start:self._n][self._mask[i, start:self._n]]
+
+    def last(self, name="close"):
+        """Latest value of a field for every ticker (NaN if absent)."""
+        if not self._n:
+            return np.full(len(self.tickers), np.nan)
+        return self._data[name][:, self._n - 1]
+
+    def bar(self, k):
+        """Rebuild bar ``k`` as a Surmount-style dict (mainly for replays that
+        need to hand a strategy the original per-bar structure)."""
+        if k < 0:
+            k += self._n
+        if not 0 <= k < self._n:
+            raise IndexError(k)
+        out = {}
+        for t, i in self._row.items():
+            if self._mask[i, k]:
+                rec = {f: float(self._data[f][i, k]) for f in FIELDS}
+                rec["date"] = self.dates[k]
+                out[t] = rec
+        return out
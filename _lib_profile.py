@@ -0,0 +1,257 @@
+"""Stage-level profiling hooks for strategy ``run()`` pipelines.
+
+Three hooks, all no-ops unless profiling was enabled:
+
+* ``@profiled(name=None, ticker=None)`` — times a function. ``ticker``
+  names the argument holding the ticker, which then becomes a child frame so
+  per-ticker cost is visible (``@profiled(ticker="ticker")``).
+* ``with span(name, ticker=None):`` — times a block.
+* ``mark(name)`` — starts a stage inside the current span or profiled call;
+  the stage ends at the next ``mark`` or when the enclosing span ends, so
+  the ``# STEP n`` sections of a long ``run()`` can be timed without
+  re-indenting them.
+
+Each frame records call count, wall time, self time (wall minus children)
+and, with ``enable(memory=True)``, the net bytes allocated while it was
+open (``tracemalloc``; expect a several-fold slowdown).
+
+When disabled, ``span`` returns a shared null context, ``mark`` returns
+immediately and ``profiled`` returns the function unchanged. Decorators
+bind when the strategy module is executed, so call ``enable()`` (or set
+``STRATEGY_PROFILE=1``) before the strategy is imported. Strategies import
+the hooks guarded, falling back to local no-ops where this module is not
+available (the Surmount platform).
+
+``collapsed()`` / ``write_collapsed(path)`` emit the folded-stack format
+read by ``flamegraph.pl``, speedscope and inferno (one ``a;b;c <self us>``
+line per frame). ``report()`` is a plain-text table.
+
+    python _lib_profile.py ed6b86dd fixtures/bars --out ed6b86dd.folded
+"""
+import argparse
+import functools
+import inspect
+import os
+import sys
+import time
+import tracemalloc
+
+
+_enabled = os.environ.get("STRATEGY_PROFILE", "") not in ("", "0")
+_memory = False
+_stack = []
+_stats = {}   # path -> [calls, seconds, self seconds, bytes]
+
+
+def enable(memory=False):
+    global _enabled, _memory
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global _enabled, _memory
+    _enabled = False
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memory = False
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    _stack.clear()
+    _stats.clear()
+
+
+# ---------------------------------------------------------------------- #
+# Frames                                                                 #
+# ---------------------------------------------------------------------- #
+
+class _Frame:
+
+    __slots__ = ("path", "start", "mem", "children", "is_mark")
+
+    def __init__(self, path, is_mark=False):
+        self.path = path
+        self.children = 0.0
+        self.is_mark = is_mark
+        self.mem = tracemalloc.get_traced_memory()[0] if _memory else 0
+        self.start = time.perf_counter()
+
+
+def _push(labels, is_mark=False):
+    parent = _stack[-1].path if _stack else ()
+    _stack.append(_Frame(parent + labels, is_mark))
+
+
+def _pop():
+    now = time.perf_counter()
+    frame = _stack.pop()
+    elapsed = now - frame.start
+    alloc = tracemalloc.get_traced_memory()[0] - frame.mem if _memory else 0
+    entry = _stats.get(frame.path)
+    if entry is None:
+        entry = _stats[frame.path] = [0, 0.0, 0.0, 0]
+    entry[0] += 1
+    entry[1] += elapsed
+    entry[2] += elapsed - frame.children
+    entry[3] += alloc
+    if _stack:
+        _stack[-1].children += elapsed
+
+
+def _labels(name, ticker):
+    return (name,) if ticker is None else (name, str(ticker))
+
+
+class _Span:
+
+    __slots__ = ("labels", "depth")
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.depth = len(_stack)
+        for k in range(len(self.labels)):
+            _push(self.labels[k:k + 1])
+        return self
+
+    def __exit__(self, *exc):
+        while len(_stack) > self.depth:
+            _pop()
+        return False
+
+
+class _NullSpan:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+# ---------------------------------------------------------------------- #
+# Hooks                                                                  #
+# ---------------------------------------------------------------------- #
+
+def span(name, ticker=None):
+    if not _enabled:
+        return _NULL
+    return _Span(_labels(name, ticker))
+
+
+def mark(name):
+    if not _enabled:
+        return
+    if _stack and _stack[-1].is_mark:
+        _pop()
+    _push((name,), is_mark=True)
+
+
+def profiled(name=None, ticker=None):
+    def decorate(fn):
+        if not _enabled:
+            return fn
+        label = name or fn.__qualname__
+        position = None
+        if ticker is not None:
+            params = list(inspect.signature(fn).parameters)
+            position = params.index(ticker)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            key = None
+            if position is not None:
+                key = args[position] if position < len(args) \
+                    else kwargs.get(ticker)
+            with _Span(_labels(label, key)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ---------------------------------------------------------------------- #
+# Output                                                                 #
+# ---------------------------------------------------------------------- #
+
+def stats():
+    """``{path: (calls, seconds, self_seconds, bytes)}`` copy."""
+    return {path: tuple(v) for path, v in _stats.items()}
+
+
+def collapsed():
+    """Folded stacks, self time in microseconds."""
+    lines = []
+    for path, (_, _, own, _) in sorted(_stats.items()):
+        us = int(round(own * 1e6))
+        if us > 0:
+            label = ";".join(p.replace(";", ",").replace(" ", "_")
+                             for p in path)
+            lines.append(f"{label} {us}")
+    return "\n".join(lines) + "\n"
+
+
+def write_collapsed(path):
+    with open(path, "w") as f:
+        f.write(collapsed())
+
+
+def report(top=30):
+    rows = sorted(_stats.items(), key=lambda kv: -kv[1][1])[:top]
+    width = max([len(" > ".join(p)) for p, _ in rows] + [5])
+    out = [f"{'frame':<{width}} {'calls':>8} {'total ms':>10} "
+           f"{'self ms':>10} {'us/call':>9} {'KiB':>9}"]
+    for path, (calls, total, own, alloc) in rows:
+        out.append(f"{' > '.join(path):<{width}} {calls:>8} "
+                   f"{1000 * total:>10.2f} {1000 * own:>10.2f} "
+                   f"{1e6 * total / calls:>9.1f} {alloc / 1024:>9.1f}")
+    return "\n".join(out)
+
+
+def main(argv=None):
+    import _lib_replay
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("strategy", help="strategy directory or uuid prefix")
+    parser.add_argument("bars", help="bar fixture file or directory")
+    parser.add_argument("--datasets", help="dataset fixture directory")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--warmup", type=int, default=0)
+    parser.add_argument("--memory", action="store_true",
+                        help="also record allocations (slow)")
+    parser.add_argument("--out", help="write folded stacks here")
+    args = parser.parse_args(argv)
+
+    enable(memory=args.memory)
+    strategy = _lib_replay.load_strategy(args.strategy)
+    if not hasattr(type(strategy).run, "__wrapped__"):
+        strategy.run = profiled("run")(strategy.run)
+    bars = _lib_replay.load_bars(args.bars, tickers=set(strategy.assets),
+                                 start=args.start, end=args.end)
+    datasets = _lib_replay.load_datasets(args.datasets, strategy.data or [])
+    _lib_replay.replay(strategy, bars, datasets, warmup=args.warmup)
+    print(report())
+    if args.out:
+        write_collapsed(args.out)
+
+
+if __name__ == "__main__":
+    # strategies import ``_lib_profile``; run through that module so they
+    # see the state enabled here rather than this ``__main__`` copy
+    import _lib_profile
+    sys.exit(_lib_profile.main())
@@ -0,0 +1,102 @@
+"""Exact running percentiles over an insert-only stream.
+
+The volatility-regime strategies take ``np.percentile(vol_current, q)`` of
+their whole volatility history on every bar, which re-partitions the full
+array each time although the history only ever grows at the end.
+
+``RunningPercentile(q)`` answers the same query incrementally. The values
+are split into a max-heap holding the lowest ``floor((n - 1) * q / 100) + 1``
+values and a min-heap holding the rest, so the two order statistics that
+``np.percentile``'s default (linear) method interpolates between are always
+the heap tops. An insert costs O(log n), a query O(1), and the result is
+bit-identical to ``np.percentile`` on the same values (NaN once a NaN has
+been inserted, as ``np.percentile`` returns for arrays containing NaN).
+
+``RunningPercentiles`` keeps several percentiles of one stream and can be
+synced against a growing array, feeding only the new tail:
+
+    thresholds = RunningPercentiles((55, 80))
+    ...
+    volaT, volaH = thresholds.sync(vol_current)   # O(new values x log n)
+"""
+import heapq
+import math
+
+
+class RunningPercentile:
+    """``np.percentile(values, q)`` maintained under insertion."""
+
+    def __init__(self, q):
+        if not 0 <= q <= 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.q = q
+        self._quantile = q / 100
+        self._lower = []   # max-heap (negated) of the lowest values
+        self._upper = []   # min-heap of the rest
+        self._n = 0
+        self._nan = False
+
+    def __len__(self):
+        return self._n
+
+    def _target(self):
+        return int(math.floor((self._n - 1) * self._quantile)) + 1
+
+    def add(self, x):
+        x = float(x)
+        self._n += 1
+        if x != x:
+            self._nan = True
+            return
+        lower, upper = self._lower, self._upper
+        if lower and x <= -lower[0]:
+            heapq.heappush(lower, -x)
+        else:
+            heapq.heappush(upper, x)
+        target = self._target()
+        while len(lower) > target:
+            heapq.heappush(upper, -heapq.heappop(lower))
+        while len(lower) < target and upper:
+            heapq.heappush(lower, -heapq.heappop(upper))
+
+    def value(self):
+        if not self._n or self._nan:
+            return math.nan
+        virtual = (self._n - 1) * self._quantile
+        gamma = virtual - math.floor(virtual)
+        a = -self._lower[0]
+        b = self._upper[0] if self._upper else a
+        # np.percentile's _lerp, including its t >= 0.5 branch
+        diff = b - a
+        if gamma >= 0.5:
+            return b - diff * (1 - gamma)
+        return a + diff * gamma
+
+
+class RunningPercentiles:
+    """Several ``RunningPercentile`` over the same growing array."""
+
+    def __init__(self, qs):
+        self.qs = tuple(qs)
+        self.reset()
+
+    def reset(self):
+        self._heaps = [RunningPercentile(q) for q in self.qs]
+        self._fed = 0
+
+    def add(self, x):
+        for h in self._heaps:
+            h.add(x)
+        self._fed += 1
+
+    def values(self):
+        return tuple(h.value() for h in self._heaps)
+
+    def sync(self, array):
+        """Percentiles of ``array``, assuming everything already fed is an
+        unchanged prefix of it; a shorter array starts over."""
+        if len(array) < self._fed:
+            self.reset()
+        for x in array[self._fed:]:
+            self.add(x)
+        return self.values()
@@ -0,0 +1,372 @@
+"""Local bar-by-bar replay of a strategy directory.
+
+Loads ``<uuid>/main.py`` against the stand-in ``surmount`` package from
+``_lib_surmount_mock`` (or builds a ``<uuid>/main.json`` strategy with
+``_lib_dsl`` / ``_lib_fixed_mix``), replays historical bars from local CSV/Parquet
+fixtures and records the allocation returned on every bar together with
+turnover and a close-to-close equity curve.
+
+Bars are streamed through ``run()`` the way the platform does it: on bar
+``k`` the strategy receives ``data["ohlcv"]`` holding bars ``0..k`` (oldest
+first, one ``{ticker: {"open", "high", "low", "close", "volume", "date"}}``
+dict per bar, dates formatted ``"%Y-%m-%d %H:%M:%S"``), plus one entry per
+dataset declared in ``TradingStrategy.data`` under ``tuple(source)`` holding
+the fixture records dated on or before the bar. The same history list is
+extended in place between calls, so a replay costs no copying (strategies
+declaring ``max_lookback`` get a bounded view of it, see ``_lib_history``).
+With ``--compact`` the bars are loaded straight into a
+``_lib_history.ColumnarHistory`` instead of per-bar dicts and strategies see
+read-only dict-like views of it, which keeps years of hourly bars in a few
+bytes per value.
+
+Fixtures:
+
+* bars — either one long-format file (``date, ticker, open, high, low,
+  close, volume``) or a directory holding ``<TICKER>.csv`` / ``.parquet``
+  files with the same columns minus ``ticker``. Bars are replayed at the
+  granularity they are stored in; nothing is resampled to the strategy's
+  ``interval``.
+* datasets — optional directory with ``<key>.csv`` / ``.parquet`` per
+  dataset, ``<key>`` being the dataset key joined with ``__`` (for example
+  ``median_cpi.csv`` or ``insider_trading__AAPL.csv``). Records need a
+  ``date`` column.
+
+Accounting: weights set on bar ``k`` are held until bar ``k + 1`` and drift
+with the close-to-close returns; ``None`` from ``run()`` keeps the drifted
+weights. Turnover on a rebalance is ``sum(|target - drifted|)`` and the
+uninvested remainder earns nothing.
+
+    python _lib_replay.py 0ac07374-f793-4b8f-85da-7da100084489 fixtures/bars \\
+        --start 2015-01-01 --out allocations.csv
+"""
+import argparse
+import importlib.util
+import json
+import math
+import os
+import sys
+import time
+
+import pandas as pd
+
+import _lib_dsl
+import _lib_fixed_mix
+import _lib_history
+import _lib_schedule
+import _lib_surmount_mock
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+# ---------------------------------------------------------------------- #
+# Loading                                                                #
+# ---------------------------------------------------------------------- #
+
+def _entry_point(directory):
+    for entry in ("main.py", "main.json"):
+        path = os.path.join(os.path.abspath(directory), entry)
+        if os.path.isfile(path):
+            return path
+    return os.path.join(os.path.abspath(directory), "main.py")
+
+
+def strategy_path(name):
+    """Resolve a strategy directory name (or a unique uuid prefix, or a path
+    to ``main.py`` / ``main.json``) to the strategy file."""
+    if os.path.isfile(name):
+        return os.path.abspath(name)
+    path = name if os.path.isdir(name) else os.path.join(ROOT, name)
+    if os.path.isdir(path):
+        return _entry_point(path)
+    matches = [d for d in os.listdir(ROOT)
+               if d.startswith(name) and os.path.isdir(os.path.join(ROOT, d))]
+    if len(matches) != 1:
+        raise ValueError(f"{name!r} matches {len(matches)} strategy "
+                         f"directories")
+    return _entry_point(os.path.join(ROOT, matches[0]))
+
+
+def load_strategy(name):
+    """Import a strategy module against the stand-in SDK and return a fresh
+    ``TradingStrategy`` instance."""
+    _lib_surmount_mock.install()
+    path = strategy_path(name)
+    if path.endswith(".json"):
+        return _load_json_strategy(path)
+    module_name = "strategy_" + os.path.basename(os.path.dirname(path)) \
+        .replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "TradingStrategy"):
+        raise ValueError(f"{path} does not define TradingStrategy")
+    return module.TradingStrategy()
+
+
+def _load_json_strategy(path):
+    with open(path) as f:
+        spec = json.load(f)
+    if "strategy" in spec:
+        return _lib_dsl.JSONStrategy(spec)
+    if "allocations" in spec:
+        return _lib_fixed_mix.FixedMixStrategy(spec)
+    raise ValueError(f"{path} is neither a DSL nor a fixed-mix strategy")
+
+
+def _read_table(path):
+    if path.endswith(".parquet"):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+    frame.columns = [str(c).strip().lower() for c in frame.columns]
+    for alias in ("datetime", "timestamp", "time"):
+        if "date" not in frame.columns and alias in frame.columns:
+            frame = frame.rename(columns={alias: "date"})
+    if "date" not in frame.columns:
+        raise ValueError(f"{path}: no date column")
+    frame["date"] = pd.to_datetime(frame["date"])
+    return frame
+
+
+def load_frame(path, tickers=None, start=None, end=None):
+    """Bar fixtures as one long ``date, ticker, open, ..., volume`` frame
+    sorted by date then ticker."""
+    if os.path.isdir(path):
+        frames = []
+        for entry in sorted(os.listdir(path)):
+            ticker, ext = os.path.splitext(entry)
+            if ext not in (".csv", ".parquet"):
+                continue
+            if tickers is not None and ticker not in tickers:
+                continue
+            frame = _read_table(os.path.join(path, entry))
+            frame["ticker"] = ticker
+            frames.append(frame)
+        if not frames:
+            raise ValueError(f"{path}: no bar fixtures found")
+        frame = pd.concat(frames, ignore_index=True)
+    else:
+        frame = _read_table(path)
+        if tickers is not None:
+            frame = frame[frame["ticker"].isin(tickers)]
+    if start is not None:
+        frame = frame[frame["date"] >= pd.Timestamp(start)]
+    if end is not None:
+        frame = frame[frame["date"] <= pd.Timestamp(end)]
+    return frame.sort_values(["date", "ticker"], kind="stable")
+
+
+def load_bars(path, tickers=None, start=None, end=None):
+    """Build the ``data["ohlcv"]`` list from bar fixtures."""
+    frame = load_frame(path, tickers, start, end)
+    bars = []
+    current = current_date = None
+    columns = [frame[f].astype(float).tolist() for f in BAR_FIELDS]
+    for k, (date, ticker) in enumerate(zip(frame["date"], frame["ticker"])):
+        if date != current_date:
+            current_date = date
+            stamp = date.strftime(DATE_FORMAT)
+            current = {}
+            bars.append(current)
+        rec = {f: col[k] for f, col in zip(BAR_FIELDS, columns)}
+        rec["date"] = stamp
+        current[ticker] = rec
+    return bars
+
+
+def load_history(path, tickers=None, start=None, end=None,
+                 dtype="float64"):
+    """Bar fixtures as a ``ColumnarHistory`` (no per-bar dicts)."""
+    frame = load_frame(path, tickers, start, end)
+    return _lib_history.ColumnarHistory.from_frame(frame, dtype=dtype)
+
+
+def load_datasets(path, sources):
+    """Fixture records per dataset key, sorted by date."""
+    datasets = {}
+    for source in sources:
+        key = tuple(source)
+        name = "__".join(str(k) for k in key)
+        records = []
+        for ext in (".csv", ".parquet"):
+            file = os.path.join(path, name + ext) if path else None
+            if file and os.path.isfile(file):
+                frame = _read_table(file).sort_values("date", kind="stable")
+                frame["date"] = frame["date"].dt.strftime(DATE_FORMAT)
+                records = frame.to_dict("records")
+                break
+        datasets[key] = records
+    return datasets
+
+
+# ---------------------------------------------------------------------- #
+# Replay                                                                 #
+# ---------------------------------------------------------------------- #
+
+class ReplayResult:
+    """Per-bar record of a replay."""
+
+    def __init__(self):
+        self.dates = []
+        self.allocations = []   # dict returned on the bar, or None
+        self.weights = []       # weights held after the bar
+        self.turnover = []
+        self.equity = []
+        self.seconds = 0.0
+
+    def to_frame(self):
+        frame = pd.DataFrame(self.weights, index=self.dates).fillna(0.0)
+        frame["turnover"] = self.turnover
+        frame["equity"] = self.equity
+        return frame
+
+    def summary(self):
+        if not self.equity:
+            return {}
+        peak, drawdown = -math.inf, 0.0
+        for value in self.equity:
+            peak = max(peak, value)
+            drawdown = min(drawdown, value / peak - 1)
+        return {
+            "bars": len(self.dates),
+            "start": self.dates[0],
+            "end": self.dates[-1],
+            "total_return": self.equity[-1] - 1,
+            "max_drawdown": drawdown,
+            "turnover": sum(self.turnover),
+            "rebalances": sum(a is not None for a in self.allocations),
+            "seconds": self.seconds,
+            "ms_per_bar": 1000 * self.seconds / len(self.dates),
+        }
+
+
+def _dataset_view(records, date, cursor):
+    """Records dated on or before ``date`` (``cursor`` tracks the prefix)."""
+    k = cursor
+    while k < len(records) and str(records[k]["date"]) <= date:
+        k += 1
+    return k
+
+
+def replay(strategy, bars, datasets=None, warmup=0):
+    """Stream ``bars`` through ``strategy.run`` and return a ReplayResult.
+
+    The first ``warmup`` bars are handed to the strategy as history but no
+    allocation is requested for them. A strategy declaring a ``schedule``
+    (see ``_lib_schedule``) is only run on its scheduled bars."""
+    datasets = datasets or {}
+    cursors = {key: 0 for key in datasets}
+    result = ReplayResult()
+    lookback = getattr(strategy, "max_lookback", None)
+    if isinstance(bars, _lib_history.ColumnarHistory):
+        # the store already holds every bar; hand out a growing window
+        history = bars.window(0, warmup, limit=lookback)
+    elif lookback:
+        history = _lib_history.BoundedHistory(lookback, bars[:warmup])
+    else:
+        history = bars[:warmup]
+    weights = {}
+    equity = 1.0
+    prev_close = {}
+    started = time.perf_counter()
+    if hasattr(strategy, "prepare"):
+        # vectorized strategies evaluate the whole replay up front
+        strategy.prepare(bars)
+    schedule = _lib_schedule.Schedule.from_strategy(strategy)
+    if schedule is not None:
+        due = schedule.mask([next(iter(b.values()))["date"] for b in bars])
+        due[warmup:warmup + 1] = True
+    last_target = None
+
+    for k, bar in enumerate(bars[warmup:], warmup):
+        date = next(iter(bar.values()))["date"]
+
+        # returns earned by the weights held over the previous bar
+        growth = 1.0 - sum(weights.values())
+        drifted = {}
+        for ticker, w in weights.items():
+            close = bar.get(ticker, {}).get("close")
+            prev = prev_close.get(ticker)
+            ret = close / prev if close and prev else 1.0
+            drifted[ticker] = w * ret
+            growth += w * ret
+        if growth > 0:
+            drifted = {t: w / growth for t, w in drifted.items()}
+        equity *= growth
+
+        history.append(bar)
+        if schedule is None or due[k]:
+            data = {"ohlcv": history}
+            for key, records in datasets.items():
+                cursors[key] = _dataset_view(records, date, cursors[key])
+                data[key] = records[:cursors[key]]
+            target = last_target = strategy.run(data)
+        elif schedule.hold == "repeat":
+            target = last_target
+        else:
+            target = None
+        allocation = None
+        turnover = 0.0
+        if target is not None:
+            allocation = dict(getattr(target, "allocation", target))
+            new = {t: float(w) for t, w in allocation.items() if w}
+            turnover = sum(abs(new.get(t, 0.0) - drifted.get(t, 0.0))
+                           for t in set(new) | set(drifted))
+            drifted = new
+        weights = drifted
+        for ticker, rec in bar.items():
+            if rec.get("close"):
+                prev_close[ticker] = rec["close"]
+
+        result.dates.append(date)
+        result.allocations.append(allocation)
+        result.weights.append(dict(weights))
+        result.turnover.append(turnover)
+        result.equity.append(equity)
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def run_directory(name, bars_path, datasets_path=None, start=None, end=None,
+                  warmup=0, compact=None):
+    """Load a strategy and its fixtures and replay it. ``compact`` (a NumPy
+    dtype name) loads the bars into a ``ColumnarHistory`` of that dtype."""
+    strategy = load_strategy(name)
+    tickers = set(strategy.assets)
+    if compact:
+        bars = load_history(bars_path, tickers=tickers, start=start, end=end,
+                            dtype=compact)
+    else:
+        bars = load_bars(bars_path, tickers=tickers, start=start, end=end)
+    datasets = load_datasets(datasets_path, strategy.data or [])
+    return replay(strategy, bars, datasets, warmup=warmup)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("strategy", help="strategy directory or uuid prefix")
+    parser.add_argument("bars", help="bar fixture file or directory")
+    parser.add_argument("--datasets", help="dataset fixture directory")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--warmup", type=int, default=0)
+    parser.add_argument("--compact", nargs="?", const="float64",
+                        choices=("float64", "float32"),
+                        help="store bars as NumPy columns (default float64)")
+    parser.add_argument("--out", help="write per-bar weights/equity as CSV")
+    args = parser.parse_args(argv)
+
+    result = run_directory(args.strategy, args.bars, args.datasets,
+                           args.start, args.end, args.warmup, args.compact)
+    for key, value in result.summary().items():
+        print(f"{key:>14}: {value}")
+    if args.out:
+        result.to_frame().to_csv(args.out)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Declarative rebalance schedules for strategies.
+
+A strategy whose ``run()`` only does real work on some bars can declare
+when, so a runner can skip building ``data`` and calling ``run()`` on every
+other bar::
+
+    @property
+    def schedule(self):
+        return {"weekday": 1, "hold": "repeat"}
+
+Keys (exactly one trigger):
+
+* ``every`` — every N-th bar, counted from the first bar of the history.
+* ``weekday`` — bars dated on that weekday (0 = Monday).
+* ``month_day`` — the first bar on or after calendar day N of a month
+  (``day == N or (day > N and previous bar's day < N)``).
+* ``trading_day`` — the N-th bar of each month (1-based).
+* ``month_start`` / ``month_end`` — first / last bar of each month
+  (``month_end`` looks at the next bar's date; the final bar counts).
+* ``first_session`` / ``last_session`` — ``"week"``, ``"month"``,
+  ``"quarter"`` or ``"year"``: bars dated on the first / last trading
+  session of that period according to ``_lib_calendar.nyse()`` rather than
+  the bars at hand, so the last session is known on its own bars (every
+  bar of that session on intraday data).
+
+``hold`` says what the skipped bars stand for: ``"none"`` (the strategy
+would have returned ``None``: keep the drifted weights) or ``"repeat"``
+(it would have returned its previous allocation again). The runner always
+calls ``run()`` on the first bar so the strategy can set its initial
+allocation.
+
+The declaration is only a promise about ``run()``'s own gating: the
+Surmount platform ignores the property, so strategies keep their in-code
+checks and the skip is purely a runner optimization.
+"""
+import numpy as np
+import pandas as pd
+
+import _lib_calendar
+
+
+TRIGGERS = ("every", "weekday", "month_day", "trading_day", "month_start",
+            "month_end", "first_session", "last_session")
+HOLDS = ("none", "repeat")
+
+
+class Schedule:
+    """Parsed ``schedule`` declaration."""
+
+    def __init__(self, hold="none", **trigger):
+        unknown = set(trigger) - set(TRIGGERS)
+        if unknown:
+            raise ValueError(f"unknown schedule keys {sorted(unknown)}")
+        active = {k: v for k, v in trigger.items()
+                  if v is not None and v is not False}
+        if len(active) != 1:
+            raise ValueError("a schedule needs exactly one trigger")
+        if hold not in HOLDS:
+            raise ValueError(f"hold must be one of {HOLDS}")
+        (self.kind, self.value), = active.items()
+        self.hold = hold
+
+    @classmethod
+    def from_strategy(cls, strategy):
+        """The strategy's schedule, or ``None`` if it declares none."""
+        spec = getattr(strategy, "schedule", None)
+        if not spec:
+            return None
+        return cls(**spec)
+
+    def __repr__(self):
+        return f"Schedule({self.kind}={self.value!r}, hold={self.hold!r})"
+
+    def mask(self, dates):
+        """Boolean mask of the bars ``run()`` has to be called on."""
+        n = len(dates)
+        if not n:
+            return np.zeros(0, dtype=bool)
+        index = pd.DatetimeIndex(pd.to_datetime(list(dates)))
+        if self.kind == "every":
+            due = np.arange(n) % int(self.value) == 0
+        elif self.kind == "weekday":
+            due = index.weekday.to_numpy() == int(self.value)
+        elif self.kind == "first_session":
+            due = _lib_calendar.nyse().is_first(index, self.value)
+        elif self.kind == "last_session":
+            due = _lib_calendar.nyse().is_last(index, self.value)
+        else:
+            day = index.day.to_numpy()
+            month = index.year.to_numpy() * 12 + index.month.to_numpy()
+            new_month = np.ones(n, dtype=bool)
+            new_month[1:] = month[1:] != month[:-1]
+            if self.kind == "month_day":
+                target = int(self.value)
+                prev = np.concatenate([[target], day[:-1]])
+                due = (day == target) | ((day > target) & (prev < target))
+            elif self.kind == "trading_day":
+                starts = np.flatnonzero(new_month)
+                rank = np.arange(n) - starts[np.cumsum(new_month) - 1]
+                due = rank == int(self.value) - 1
+            elif self.kind == "month_start":
+                due = new_month
+            else:
+                due = np.ones(n, dtype=bool)
+                due[:-1] = new_month[1:]
+        due[0] = True
+        return due
@@ -0,0 +1,188 @@
+"""Offline stand-ins for the ``surmount`` package.
+
+``install()`` registers lightweight ``surmount``, ``surmount.base_class``,
+``surmount.technical_indicators``, ``surmount.data`` and ``surmount.logging``
+modules in ``sys.modules`` so any ``<uuid>/main.py`` in this tree can be
+imported and driven without network access or the real SDK. It does nothing
+for modules that are already importable unless ``force=True``, so it is safe
+to call from a strategy's ``if __name__ == "__main__"`` block (the module is
+also exposed as ``surmount.products._lib_surmount_mock`` for the strategies
+that import it under that name).
+
+What the stand-ins provide:
+
+* ``base_class.Strategy`` / ``TargetAllocation`` — the allocation keeps the
+  dict it was given as ``.allocation`` and rejects non-numeric weights.
+* ``technical_indicators`` — the pandas_ta-equivalent batch functions from
+  ``_lib_indicators``, memoized per bar by ``_lib_indicators.cache``;
+  indicators without a local implementation raise ``NotImplementedError``
+  when called.
+* ``data`` — any dataset class name (``MedianCPI()``, ``InsiderTrading("AAPL")``
+  ...) is a key object that iterates to ``("median_cpi",)`` /
+  ``("insider_trading", "AAPL")``, matching the ``data[tuple(source)]``
+  lookups the strategies do. The replay runner fills those keys from local
+  fixtures.
+* ``logging.log`` — messages go to ``LOG`` (bounded) instead of stdout.
+"""
+import numbers
+import re
+import sys
+import types
+from collections import deque
+
+import _lib_indicators
+
+
+LOG = deque(maxlen=10000)
+
+_IMPLEMENTED = ("SMA", "EMA", "RSI", "ATR", "VWAP", "STDEV", "BB",
+                "MACD", "Momentum", "Slope", "MFI")
+_NOT_IMPLEMENTED = ("ADX", "CCI", "PPO", "SO", "WillR", "PSAR", "OBV")
+
+
+# ---------------------------------------------------------------------- #
+# surmount.base_class                                                    #
+# ---------------------------------------------------------------------- #
+
+class Strategy:
+    """Base class of every ``TradingStrategy``."""
+
+    @property
+    def assets(self):
+        return []
+
+    @property
+    def interval(self):
+        return "1day"
+
+    @property
+    def data(self):
+        return []
+
+    def run(self, data):
+        raise NotImplementedError
+
+
+class TargetAllocation:
+    """Target weights returned by ``Strategy.run``."""
+
+    def __init__(self, allocation):
+        if not isinstance(allocation, dict):
+            raise TypeError("TargetAllocation expects a dict of weights")
+        for ticker, weight in allocation.items():
+            if not isinstance(weight, numbers.Real):
+                raise TypeError(f"weight for {ticker!r} is not a number: "
+                                f"{weight!r}")
+        self.allocation = dict(allocation)
+
+    def __repr__(self):
+        return f"TargetAllocation({self.allocation!r})"
+
+
+def backtest(*args, **kwargs):
+    raise NotImplementedError(
+        "backtests run through _lib_replay locally")
+
+
+# ---------------------------------------------------------------------- #
+# surmount.data                                                          #
+# ---------------------------------------------------------------------- #
+
+def _snake(name):
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])", "_",
+                  name).lower()
+
+
+class DataSource:
+    """Key object for a Surmount dataset: ``tuple(source)`` is the key the
+    dataset's records are stored under in ``data``."""
+
+    key_name = "data_source"
+
+    def __init__(self, *args):
+        self.args = args
+
+    def __iter__(self):
+        return iter((self.key_name,) + tuple(self.args))
+
+    def __repr__(self):
+        args = ", ".join(repr(a) for a in self.args)
+        return f"{type(self).__name__}({args})"
+
+
+def _data_source(name):
+    return type(name, (DataSource,), {"key_name": _snake(name)})
+
+
+def _data_getattr(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    cls = _data_source(name)
+    setattr(sys.modules["surmount.data"], name, cls)
+    return cls
+
+
+# ---------------------------------------------------------------------- #
+# surmount.logging / surmount.technical_indicators                       #
+# ---------------------------------------------------------------------- #
+
+def log(message, *args, **kwargs):
+    LOG.append(str(message))
+
+
+def _not_implemented(name):
+    def indicator(*args, **kwargs):
+        raise NotImplementedError(f"{name} has no local implementation")
+    indicator.__name__ = name
+    return indicator
+
+
+# ---------------------------------------------------------------------- #
+# Installation                                                           #
+# ---------------------------------------------------------------------- #
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def install(force=False):
+    """Register the stand-in ``surmount`` modules and return the package."""
+    if not force:
+        try:
+            import surmount.base_class  # noqa: F401
+            return sys.modules["surmount"]
+        except ImportError:
+            pass
+
+    package = _module("surmount", __path__=[])
+    base_class = _module("surmount.base_class", Strategy=Strategy,
+                         TargetAllocation=TargetAllocation,
+                         backtest=backtest)
+    indicators = _module(
+        "surmount.technical_indicators",
+        **{n: _lib_indicators.cache.wrap(getattr(_lib_indicators, n))
+           for n in _IMPLEMENTED},
+        **{n: _not_implemented(n) for n in _NOT_IMPLEMENTED})
+    data = _module("surmount.data", DataSource=DataSource,
+                   __getattr__=_data_getattr)
+    logging = _module("surmount.logging", log=log, LOG=LOG)
+    products = _module("surmount.products", __path__=[],
+                       _lib_surmount_mock=sys.modules[__name__])
+
+    modules = {
+        "surmount": package,
+        "surmount.base_class": base_class,
+        "surmount.technical_indicators": indicators,
+        "surmount.data": data,
+        "surmount.logging": logging,
+        "surmount.products": products,
+        "surmount.products._lib_surmount_mock": sys.modules[__name__],
+    }
+    for name, module in modules.items():
+        sys.modules[name] = module
+        if "." in name:
+            parent, _, child = name.rpartition(".")
+            setattr(sys.modules[parent], child, module)
+    return package
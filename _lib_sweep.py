@@ -0,0 +1,203 @@
+"""Opening-range-breakout parameter grids evaluated in one pass.
+
+e8a442ee exposes ``stop_mode``, ``atr_period``, ``atr_stop_mult``,
+``profit_target_r``, ``risk_per_trade`` and ``eod_exit_hhmm``; f04579df
+hardcodes the same ideas as ``stop_atr_multiplier``, ``target_R`` and
+``portfolio_risk``. Tuning them with the replay means one full backtest per
+combination, although every combination shares the same sessions, opening
+ranges and daily ATRs and differs only in a few scalars.
+
+``sweep(prices, sessions, grid)`` computes the shared arrays once — the
+opening ranges (``_lib_fills.opening_ranges``), one lagged daily ATR per
+distinct ``atr_period`` and one flatten bar per distinct ``eod_exit_hhmm``
+— and broadcasts the parameters as a leading combination axis: stops and
+targets come from ``_lib_fills.orb_brackets``, the same levels
+``opening_range_trades`` gives a single run, as combinations x sessions
+arrays, every trade of every combination is resolved by a single
+``_lib_fills.simulate`` call (same fill rules and slippage), and
+per-session returns are reduced to CAGR, Sharpe ratio and maximum
+drawdown per combination.
+
+Each session follows e8a442ee's rules: the first bar's candle sets the
+direction (``long_only`` keeps bullish ranges only, as in f04579df), the
+entry is the next bar's open, the stop is ``atr_stop_mult`` x the lagged
+ATR (``stop_mode="ATR"``) or the far side of the opening range ("HL"),
+the trade is flattened at the first bar at or after ``eod_exit_hhmm``,
+and the position is ``risk_per_trade / stop width`` capped at
+``max_alloc``. As in the strategy, only HL mode has a target,
+``profit_target_r`` stop widths away (None or 0: none); ATR combinations
+hold to the flatten bar whatever the target axis says. f04579df's 200-bar
+EMA filter and hourly ATR are not modelled.
+
+    prices = price_arrays(bars, "TQQQ")
+    sessions = SessionIndex()
+    sessions.sync(bars)
+    result = sweep(prices, sessions, {
+        "stop_mode": ["HL"],
+        "profit_target_r": [None, 2, 10],
+        "risk_per_trade": [0.01, 0.02],
+        "eod_exit_hhmm": ["15:00", "15:55"],
+    })
+    result.frame()                  # one row per combination
+    result.cube("sharpe")           # 1 x 3 x 2 x 2 array over the grid
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from _lib_fills import (FillModel, daily_atr_pct, flatten_bars,
+                        opening_ranges, orb_brackets, simulate,
+                        target_multiple)
+
+
+# e8a442ee's defaults; grid axes override them
+DEFAULTS = {
+    "stop_mode": "ATR",
+    "atr_period": 14,
+    "atr_stop_mult": 0.05,
+    "profit_target_r": 10,
+    "risk_per_trade": 0.01,
+    "eod_exit_hhmm": "15:55",
+}
+STOP_MODES = ("ATR", "HL")
+METRICS = ("cagr", "sharpe", "max_drawdown", "trades", "win_rate")
+
+
+class SweepResult:
+    """Per-combination session returns of a ``sweep`` with the grid they
+    came from. ``returns`` is combinations x sessions (0 on sessions
+    without a trade)."""
+
+    def __init__(self, grid, combos, returns, trades, wins,
+                 periods_per_year=252):
+        self.grid = grid
+        self.combos = combos
+        self.returns = returns
+        self.trades = trades
+        self.wins = wins
+        self.periods_per_year = periods_per_year
+
+    def equity(self):
+        """combinations x sessions equity curves starting from 1."""
+        return np.cumprod(1.0 + self.returns, axis=1)
+
+    def cagr(self):
+        n = self.returns.shape[1]
+        if not n:
+            return np.full(len(self.combos), np.nan)
+        final = self.equity()[:, -1]
+        return np.maximum(final, 0.0) ** (self.periods_per_year / n) - 1.0
+
+    def sharpe(self):
+        r = self.returns
+        if r.shape[1] < 2:
+            return np.full(len(self.combos), np.nan)
+        sd = r.std(axis=1, ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = r.mean(axis=1) / sd * np.sqrt(self.periods_per_year)
+        return np.where(sd > 0, out, np.nan)
+
+    def max_drawdown(self):
+        equity = self.equity()
+        start = np.ones((len(equity), 1))
+        peak = np.maximum.accumulate(np.hstack([start, equity]), axis=1)
+        return (equity / peak[:, 1:] - 1.0).min(axis=1, initial=0.0)
+
+    def win_rate(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.trades > 0, self.wins / self.trades, np.nan)
+
+    def frame(self):
+        """Metrics per combination, indexed by the grid parameters."""
+        index = pd.MultiIndex.from_tuples(self.combos, names=list(self.grid))
+        return pd.DataFrame({
+            "cagr": self.cagr(),
+            "sharpe": self.sharpe(),
+            "max_drawdown": self.max_drawdown(),
+            "trades": self.trades,
+            "win_rate": self.win_rate(),
+        }, index=index)
+
+    def cube(self, metric="sharpe"):
+        """One metric as an array with one axis per grid parameter."""
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}")
+        values = self.frame()[metric].to_numpy()
+        return values.reshape([len(v) for v in self.grid.values()])
+
+
+def _column(combos, grid, name):
+    if name in grid:
+        i = list(grid).index(name)
+        return [c[i] for c in combos]
+    return [DEFAULTS[name]] * len(combos)
+
+
+def _lookup(values, table):
+    """Stack ``table[v]`` for every value (one row per combination)."""
+    keys = list(dict.fromkeys(values))
+    rows = np.stack([table(k) for k in keys])
+    return rows[[keys.index(v) for v in values]]
+
+
+def sweep(prices, sessions, grid, long_only=False, max_alloc=1.0,
+          range_bars=1, model=None, periods_per_year=252):
+    """Evaluate every combination of ``grid`` (a ``{parameter: values}``
+    dict over the keys of ``DEFAULTS``) and return a ``SweepResult``."""
+    if not grid:
+        raise ValueError("grid needs at least one parameter")
+    unknown = set(grid) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"unknown parameters: {sorted(unknown)}")
+    grid = {name: list(values) for name, values in grid.items()}
+    combos = list(itertools.product(*grid.values()))
+    n_combos = len(combos)
+
+    # parameters broadcast as a leading combinations axis
+    column = {name: _column(combos, grid, name) for name in DEFAULTS}
+    modes = [m for m in column["stop_mode"] if m not in STOP_MODES]
+    if modes:
+        raise ValueError(f"stop_mode must be one of {STOP_MODES}, "
+                         f"got {modes[0]!r}")
+    orb = opening_ranges(prices, sessions, range_bars)
+    atr = _lookup(column["atr_period"],
+                  lambda p: daily_atr_pct(prices, sessions, p))
+    exit_by = _lookup(column["eod_exit_hhmm"],
+                      lambda t: flatten_bars(sessions, t))
+    by_atr = np.array([m == "ATR" for m in column["stop_mode"]])[:, None]
+    mult = np.array(column["atr_stop_mult"], dtype=float)[:, None]
+    target_r = np.array([target_multiple(r)
+                         for r in column["profit_target_r"]])[:, None]
+    risk = np.array(column["risk_per_trade"], dtype=float)[:, None]
+
+    # e8a442ee only sets a target in HL mode
+    levels = orb_brackets(orb, exit_by, stop_pct=mult * atr,
+                          range_stop=~by_atr,
+                          target_r=np.where(by_atr, np.nan, target_r),
+                          long_only=long_only)
+    combo, session = np.nonzero(levels["ok"])
+    w = levels["width"][combo, session]
+    price = orb["entry_price"][session]
+    trades = pd.DataFrame({
+        "combo": combo,
+        "session": session,
+        "entry": orb["entry"][session],
+        "direction": levels["direction"][session],
+        "stop": levels["stop"][combo, session],
+        "target": levels["target"][combo, session],
+        "exit_by": exit_by[combo, session],
+        "size": np.minimum(max_alloc, risk[combo, 0] / (w / price)),
+    })
+    fills = simulate(prices, trades, model or FillModel())
+
+    returns = np.zeros((n_combos, len(orb["entry"])))
+    counts = np.zeros(n_combos, dtype=np.int64)
+    wins = np.zeros(n_combos, dtype=np.int64)
+    if len(fills):
+        ret = fills["ret"].to_numpy()
+        returns[combo, session] = fills["size"].to_numpy() * ret
+        counts = np.bincount(combo, minlength=n_combos)
+        wins = np.bincount(combo, weights=ret > 0,
+                           minlength=n_combos).astype(np.int64)
+    return SweepResult(grid, combos, returns, counts, wins, periods_per_year)
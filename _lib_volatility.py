@@ -0,0 +1,77 @@
+"""Rolling realized volatility without per-window Python callbacks.
+
+The volatility-regime strategies define realized volatility over a window of
+``n`` log returns as ``sqrt(sum(r**2) / (n - 1))`` and evaluate it with
+``log_returns.rolling(window).apply(realized_volatility_daily)``, i.e. one
+Python call per window per bar. Both forms here compute the window sums of
+squares as differences of a single running sum of squares:
+
+* ``realized_volatility(log_returns, window)`` — the whole series at once
+  (NaN for the first ``window - 1`` positions, like ``rolling().apply``).
+
+* ``RealizedVolatility(window)`` — the incremental form: ``update(r)`` adds
+  one log return and returns the latest value in O(1). The running sum is
+  accumulated in the same order as ``np.cumsum``, so the streamed values
+  are identical to the vectorized ones, and the full series is kept so it
+  can still be smoothed or percentile-ranked afterwards.
+
+    vol = RealizedVolatility(60)
+    for r in new_log_returns:
+        vol.update(r)
+    vol.last, vol.values()      # latest value, full series as an array
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+
+def realized_volatility(log_returns, window):
+    """Rolling ``sqrt(sum(r**2) / (window - 1))`` over every ``window``
+    consecutive log returns."""
+    log_returns = np.asarray(log_returns, dtype=float)
+    sum_sq = np.concatenate(([0.0], np.cumsum(log_returns ** 2)))
+    vola = np.full(len(log_returns), np.nan)
+    vola[window - 1:] = np.sqrt(
+        (sum_sq[window:] - sum_sq[:-window]) / (window - 1))
+    return vola
+
+
+class RealizedVolatility:
+    """Incremental ``realized_volatility`` fed one log return at a time."""
+
+    def __init__(self, window):
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.window = int(window)
+        # running sums of squares covering the last ``window`` returns
+        self._sum_sq = deque([0.0], maxlen=self.window + 1)
+        self._values = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def update(self, log_return):
+        """Append one log return and return the volatility of the window
+        ending at it (NaN until ``window`` returns have been seen)."""
+        sum_sq = self._sum_sq
+        sum_sq.append(sum_sq[-1] + log_return * log_return)
+        if len(sum_sq) <= self.window:
+            value = math.nan
+        else:
+            value = math.sqrt((sum_sq[-1] - sum_sq[0]) / (self.window - 1))
+        self._values.append(value)
+        return value
+
+    def extend(self, log_returns):
+        for r in log_returns:
+            self.update(float(r))
+        return self.last
+
+    @property
+    def last(self):
+        return self._values[-1] if self._values else math.nan
+
+    def values(self):
+        """The full volatility series so far, as a float array."""
+        return np.array(self._values, dtype=float)
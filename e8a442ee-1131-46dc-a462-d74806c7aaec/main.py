@@ -19,13 +19,17 @@
 #      at 100% of equity. Expect lower CAGR and lower drawdown vs. the paper.
 #   3. Interval is 5-minute bars: the opening range is exactly the first bar,
 #      and "open of the 6th 1-min bar" maps to the open of the 2nd 5-min bar.
-#   4. The engine is stateless per call, so the day's trade (entry, stop,
-#      whether the stop/target was already hit) is *re-derived* from today's
-#      bars on every run() call. Deterministic — no hidden state required.
+#   4. The day's trade (opening range, entry, stop, target, whether the
+#      stop/target was already hit) is session state advanced by each new
+#      bar, so a call costs O(new bars) instead of re-scanning the history.
+#      The daily OHLC behind the lagged ATR is rolled forward the same way.
+#      When the history does not continue the bars already seen (first call,
+#      restart) both are rebuilt from the history — same result.
 # =============================================================================
 
 from surmount.base_class import Strategy, TargetAllocation
 from surmount.logging import log
+from collections import deque
 from datetime import datetime
 
 
@@ -46,6 +50,11 @@ class TradingStrategy(Strategy):
         self.max_alloc = 1.0        # framework cap (article allowed 4x)
         self.eod_exit_hhmm = "15:55"  # flatten before the close (ET session)
 
+        # Session state and daily aggregates, advanced bar by bar in
+        # _sync_session()
+        self.session = None
+        self.days = None
+
     @property
     def assets(self):
         return [self.signal_ticker, self.inverse_ticker]
@@ -71,111 +80,190 @@ class TradingStrategy(Strategy):
             return d, t[:5]            # "HH:MM"
         return raw, "00:00"
 
-    def _daily_atr_pct(self, ohlcv, today_str):
-        """14-day ATR as a fraction of price, built by aggregating intraday
-        bars into daily OHLC for all sessions *before* today (lagged ATR,
-        as in the article: yesterday's ATR drives today's stop)."""
-        days = {}  # date -> [open, high, low, close] preserving order
-        order = []
-        for bar in ohlcv:
-            b = bar[self.signal_ticker]
-            d, _ = self._parse_dt(bar)
-            if d >= today_str:
-                continue               # strictly prior sessions only
-            if d not in days:
-                days[d] = [b["open"], b["high"], b["low"], b["close"]]
-                order.append(d)
-            else:
-                rec = days[d]
-                rec[1] = max(rec[1], b["high"])
-                rec[2] = min(rec[2], b["low"])
-                rec[3] = b["close"]
-
-        if len(order) < self.atr_period + 1:
+    def _new_days(self):
+        return {
+            "day": None,
+            "ohlc": None,      # [open, high, low, close] of the forming day
+            # completed days; the ATR only reads the last atr_period + 1
+            "closed": deque(maxlen=self.atr_period + 1),
+            "count": 0,
+        }
+
+    def _roll_day(self, d, b):
+        """Fold one intraday bar into the daily aggregates."""
+        days = self.days
+        if d != days["day"]:
+            if days["ohlc"] is not None:
+                days["closed"].append(days["ohlc"])
+                days["count"] += 1
+            days["day"] = d
+            days["ohlc"] = [b["open"], b["high"], b["low"], b["close"]]
+        else:
+            rec = days["ohlc"]
+            rec[1] = max(rec[1], b["high"])
+            rec[2] = min(rec[2], b["low"])
+            rec[3] = b["close"]
+
+    def _daily_atr_pct(self):
+        """14-day ATR as a fraction of price, from the daily OHLC of all
+        sessions *before* the forming one (lagged ATR, as in the article:
+        yesterday's ATR drives today's stop)."""
+        days = self.days
+        if days["count"] < self.atr_period + 1:
             return None                # insufficient history → no trade
 
+        order = list(days["closed"])
         trs = []
         for i in range(1, len(order)):
-            _, h, l, _ = days[order[i]]
-            prev_close = days[order[i - 1]][3]
+            _, h, l, _ = order[i]
+            prev_close = order[i - 1][3]
             trs.append(max(h - l, abs(h - prev_close), abs(l - prev_close)))
         atr = sum(trs[-self.atr_period:]) / self.atr_period
-        ref_price = days[order[-1]][3]  # normalize by yesterday's close
+        ref_price = order[-1][3]       # normalize by yesterday's close
         return atr / ref_price if ref_price > 0 else None
 
     # ------------------------------------------------------------------ #
-    # Core logic                                                          #
+    # Session state                                                       #
     # ------------------------------------------------------------------ #
 
-    def run(self, data):
-        flat = TargetAllocation({self.signal_ticker: 0, self.inverse_ticker: 0})
-        ohlcv = data.get("ohlcv") if isinstance(data, dict) else None
-        if not ohlcv or len(ohlcv) < 2:
-            return flat                                # no usable data
-
-        # Defensive: the signal ticker must be present in the latest bar
-        if self.signal_ticker not in ohlcv[-1]:
-            return flat
-
-        today_str, now_hhmm = self._parse_dt(ohlcv[-1])
-
-        # --- End-of-day exit: flatten everything near the close -----------
-        if now_hhmm >= self.eod_exit_hhmm:
-            return flat
-
-        # --- Collect today's bars -----------------------------------------
-        today_bars = [b for b in ohlcv if self._parse_dt(b)[0] == today_str]
-        if len(today_bars) < 2:
-            return flat   # still inside the opening range — no entry yet
-
-        # --- Opening range = first 5-minute bar of the session ------------
-        orb = today_bars[0][self.signal_ticker]
+    def _open_trade(self, orb, entry_bar):
+        """Direction, entry, stop and target of the day's trade, or None if
+        the session takes no trade."""
         if orb["close"] > orb["open"]:
             direction = 1     # bullish opening candle → long TQQQ
         elif orb["close"] < orb["open"]:
             direction = -1    # bearish opening candle → long SQQQ (short proxy)
         else:
-            return flat       # doji: the paper takes no trade
+            return None       # doji: the paper takes no trade
 
         # --- Entry at the open of the bar following the opening range ------
-        entry = today_bars[1][self.signal_ticker]["open"]
+        entry = entry_bar["open"]
         if entry <= 0:
-            return flat
+            return None
 
         # --- Stop placement -------------------------------------------------
         # Both stops are expressed on the TQQQ price path; the SQQQ leg is
         # exited when TQQQ crosses its (upside) stop, since SQQQ ≈ -1x TQQQ
         # in daily percentage terms.
         if self.stop_mode == "ATR":
-            atr_pct = self._daily_atr_pct(ohlcv, today_str)
+            atr_pct = self._daily_atr_pct()
             if atr_pct is None:
-                return flat
+                return None
             stop_width = self.atr_stop_mult * atr_pct * entry
         else:  # "HL": opening-range low (long) / high (short)
             stop_width = (entry - orb["low"]) if direction == 1 \
                          else (orb["high"] - entry)
 
         if stop_width <= 0:
-            return flat        # degenerate range (e.g. gap through the range)
-
-        stop_price = entry - direction * stop_width
-        target_price = (entry + direction * self.profit_target_r * stop_width
-                        if self.stop_mode == "HL" else None)
-
-        # --- Replay today's bars since entry: was the trade already closed? -
-        # One trade per day, no re-entry — exactly as in the article's engine.
-        for bar in today_bars[1:]:
-            b = bar[self.signal_ticker]
-            if direction == 1:
-                if b["low"] <= stop_price:
-                    return flat                     # long stopped out
-                if target_price and b["high"] >= target_price:
-                    return flat                     # 10R target hit (HL mode)
-            else:
-                if b["high"] >= stop_price:
-                    return flat                     # short proxy stopped out
-                if target_price and b["low"] <= target_price:
-                    return flat
+            return None        # degenerate range (e.g. gap through the range)
+
+        return {
+            "direction": direction,
+            "entry": entry,
+            "stop_width": stop_width,
+            "stop": entry - direction * stop_width,
+            "target": (entry + direction * self.profit_target_r * stop_width
+                       if self.stop_mode == "HL" else None),
+        }
+
+    def _trade_closed(self, trade, b):
+        """Whether bar ``b`` hits the trade's stop or target."""
+        if trade["direction"] == 1:
+            if b["low"] <= trade["stop"]:
+                return True                         # long stopped out
+            if trade["target"] and b["high"] >= trade["target"]:
+                return True                         # 10R target hit (HL mode)
+        else:
+            if b["high"] >= trade["stop"]:
+                return True                         # short proxy stopped out
+            if trade["target"] and b["low"] <= trade["target"]:
+                return True
+        return False
+
+    def _sync_session(self, ohlcv):
+        """Advance the session state over the bars added since the last call
+        and return it."""
+        state = self.session
+        n = len(ohlcv)
+
+        if state is not None and 0 < state["n"] <= n and \
+                ohlcv[state["n"] - 1][self.signal_ticker]["date"] == \
+                state["last"]:
+            start = state["n"]
+        else:
+            # rebuild: the session restarts at today's open, the daily
+            # aggregates from the first bar
+            state = None
+            today_str = self._parse_dt(ohlcv[-1])[0]
+            start = n - 1
+            while start > 0 and self._parse_dt(ohlcv[start - 1])[0] == \
+                    today_str:
+                start -= 1
+            self.days = self._new_days()
+            for k in range(start):
+                self._roll_day(self._parse_dt(ohlcv[k])[0],
+                               ohlcv[k][self.signal_ticker])
+
+        for k in range(start, n):
+            d, _ = self._parse_dt(ohlcv[k])
+            b = ohlcv[k][self.signal_ticker]
+            self._roll_day(d, b)
+
+            if state is None or d != state["day"]:
+                state = {"day": d, "bars": 0, "orb": None, "trade": None,
+                         "closed": False}
+            state["bars"] += 1
+
+            if state["bars"] == 1:
+                # Opening range = first bar of the session
+                state["orb"] = b
+                continue
+            if state["bars"] == 2:
+                state["trade"] = self._open_trade(state["orb"], b)
+
+            # One trade per day, no re-entry — exactly as in the article's
+            # engine: once stopped out (or at target) the day stays flat.
+            if state["trade"] is not None and not state["closed"]:
+                state["closed"] = self._trade_closed(state["trade"], b)
+
+        state["n"] = n
+        state["last"] = ohlcv[-1][self.signal_ticker]["date"]
+        self.session = state
+        return state
+
+    # ------------------------------------------------------------------ #
+    # Core logic                                                          #
+    # ------------------------------------------------------------------ #
+
+    def run(self, data):
+        flat = TargetAllocation({self.signal_ticker: 0, self.inverse_ticker: 0})
+        ohlcv = data.get("ohlcv") if isinstance(data, dict) else None
+        if not ohlcv or len(ohlcv) < 2:
+            return flat                                # no usable data
+
+        # Defensive: the signal ticker must be present in the latest bar
+        if self.signal_ticker not in ohlcv[-1]:
+            return flat
+
+        today_str, now_hhmm = self._parse_dt(ohlcv[-1])
+
+        # --- End-of-day exit: flatten everything near the close -----------
+        if now_hhmm >= self.eod_exit_hhmm:
+            return flat
+
+        # --- Today's trade, from the session state -------------------------
+        session = self._sync_session(ohlcv)
+        if session["bars"] < 2:
+            return flat   # still inside the opening range — no entry yet
+
+        trade = session["trade"]
+        if trade is None or session["closed"]:
+            return flat   # no trade today, or already stopped out / at target
+
+        direction = trade["direction"]
+        entry = trade["entry"]
+        stop_width = trade["stop_width"]
+        stop_price = trade["stop"]
 
         # --- Position sizing: risk 1% of equity against the stop -----------
         # fraction = risk / (stop distance in % of entry), capped at 100%.
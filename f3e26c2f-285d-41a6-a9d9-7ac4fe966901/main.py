@@ -55,11 +55,19 @@ class TradingStrategy(Strategy):
             log(f"Error calculating VWAP indicator: {str(e)}")
             return TargetAllocation({trade: 0})
 
-        # Filter all candles belonging strictly to the current day's session for SPY
+        # Filter all candles belonging strictly to the current day's session for SPY.
+        # Bars arrive in time order, so the session is the run of bars at the end
+        # of the history: walk back from the latest bar until the date changes.
         current_day_bars = []
-        for bar in ohlcv_list:
-            if signal in bar and bar[signal]["date"].startswith(current_date_str):
+        k = len(ohlcv_list) - 1
+        while k >= 0:
+            bar = ohlcv_list[k]
+            if signal in bar:
+                if not bar[signal]["date"].startswith(current_date_str):
+                    break
                 current_day_bars.append(bar[signal])
+            k -= 1
+        current_day_bars.reverse()
 
         # Edge Case: If this is the first bar of the day, we are mapping the opening range.
         if len(current_day_bars) <= 1: